@@ -1,11 +1,20 @@
-from flask import Flask, render_template_string
+from flask import Flask, request
 from datetime import datetime
 import socket
 import os
+import sys
+import hmac
+import signal
+import hashlib
+import time
 
 app = Flask(__name__)
 
-# HTML template with styling
+# Static files are requested with a content-hash query string (see
+# versioned_static_url), so browsers may cache them for a year
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 365 * 24 * 3600
+
+# HTML template (styles are served from static/app.css)
 HTML_TEMPLATE = """
 <!DOCTYPE html>
 <html lang="en">
@@ -13,121 +22,7 @@ HTML_TEMPLATE = """
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Docker Class Demo</title>
-    <style>
-        * {
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }
-        
-        body {
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            display: flex;
-            justify-content: center;
-            align-items: center;
-            padding: 20px;
-        }
-        
-        .container {
-            background: white;
-            border-radius: 20px;
-            padding: 50px;
-            box-shadow: 0 20px 60px rgba(0, 0, 0, 0.3);
-            text-align: center;
-            max-width: 600px;
-            animation: fadeIn 0.6s ease-in;
-        }
-        
-        @keyframes fadeIn {
-            from {
-                opacity: 0;
-                transform: translateY(-20px);
-            }
-            to {
-                opacity: 1;
-                transform: translateY(0);
-            }
-        }
-        
-        .docker-icon {
-            font-size: 80px;
-            margin-bottom: 20px;
-        }
-        
-        h1 {
-            color: #2c3e50;
-            font-size: 2.5em;
-            margin-bottom: 20px;
-            line-height: 1.3;
-        }
-        
-        .welcome-text {
-            color: #667eea;
-            font-size: 1.8em;
-            font-weight: bold;
-            margin-bottom: 15px;
-        }
-        
-        .message {
-            color: #555;
-            font-size: 1.3em;
-            margin-bottom: 30px;
-        }
-        
-        .info-box {
-            background: #f8f9fa;
-            border-left: 4px solid #667eea;
-            padding: 20px;
-            margin-top: 30px;
-            text-align: left;
-            border-radius: 8px;
-        }
-        
-        .info-box h3 {
-            color: #2c3e50;
-            margin-bottom: 15px;
-            font-size: 1.2em;
-        }
-        
-        .info-item {
-            display: flex;
-            justify-content: space-between;
-            padding: 8px 0;
-            border-bottom: 1px solid #e0e0e0;
-        }
-        
-        .info-item:last-child {
-            border-bottom: none;
-        }
-        
-        .info-label {
-            font-weight: bold;
-            color: #555;
-        }
-        
-        .info-value {
-            color: #667eea;
-            font-family: 'Courier New', monospace;
-        }
-        
-        .footer {
-            margin-top: 30px;
-            color: #999;
-            font-size: 0.9em;
-        }
-        
-        .status {
-            display: inline-block;
-            background: #10b981;
-            color: white;
-            padding: 8px 20px;
-            border-radius: 20px;
-            font-size: 0.9em;
-            margin-top: 15px;
-        }
-    </style>
+    <link rel="stylesheet" href="{{ stylesheet_url }}">
 </head>
 <body>
     <div class="container">
@@ -170,41 +65,109 @@ HTML_TEMPLATE = """
 </html>
 """
 
+def versioned_static_url(filename):
+    """URL of a static file with its content hash appended for cache busting"""
+    with open(os.path.join(app.static_folder, filename), 'rb') as f:
+        digest = hashlib.md5(f.read()).hexdigest()[:12]
+    return f"{app.static_url_path}/{filename}?v={digest}"
+
+# Compiled once at import; render_template_string would re-parse it per request
+HOME_TEMPLATE = app.jinja_env.from_string(HTML_TEMPLATE)
+STYLESHEET_URL = versioned_static_url('app.css')
+
+# Admin endpoints require this token in X-Admin-Token; when unset they only
+# answer requests from the loopback interface
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+
+# The rendered home page is reused for PAGE_CACHE_TTL seconds per worker
+# (0 renders every request); only its clock can lag by that much
+PAGE_CACHE_TTL = float(os.getenv('PAGE_CACHE_TTL', 0))
+
+class ContainerIdentity:
+    """
+    Host details that only change with the container itself.
+
+    Resolved once per worker process instead of on every request, so the
+    page and /info never block on gethostname() or a DNS lookup.
+    """
+
+    def __init__(self):
+        self.hostname = socket.gethostname()
+        try:
+            self.container_ip = socket.gethostbyname(self.hostname)
+        except OSError:
+            self.container_ip = "Unable to determine"
+        self.container_id = self.hostname[:12]
+        self.python_version = f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}"
+        self.environment = os.getenv('APP_ENV', 'development')
+        self.resolved_at = datetime.now().isoformat()
+
+
+_identity = None
+
+def get_identity():
+    """Return this worker's ContainerIdentity, resolving it on first use"""
+    global _identity
+    if _identity is None:
+        _identity = ContainerIdentity()
+    return _identity
+
+def refresh_identity(*_signal_args):
+    """Re-resolve the identity (also usable as a signal handler)"""
+    global _identity, _page
+    _identity = ContainerIdentity()
+    # The cached page shows the old hostname/IP
+    _page = None
+    return _identity
+
+def _forget_identity():
+    global _identity
+    _identity = None
+
+# Each gunicorn worker re-resolves after the fork, so `kill -HUP <master>`
+# refreshes every worker
+os.register_at_fork(after_in_child=_forget_identity)
+
+_page = None
+
+def get_page():
+    """(body, etag) of the home page, re-rendered once PAGE_CACHE_TTL has passed"""
+    global _page
+    if _page is None or time.monotonic() >= _page[2]:
+        body = render_home().encode('utf-8')
+        _page = (body, hashlib.md5(body).hexdigest(), time.monotonic() + PAGE_CACHE_TTL)
+    return _page[:2]
+
 @app.route('/')
 def home():
     """
     Main route that displays welcome message with container information
     """
-    # Get container hostname (container ID)
-    hostname = socket.gethostname()
+    if not PAGE_CACHE_TTL:
+        return render_home()
     
-    # Get container IP address
-    try:
-        container_ip = socket.gethostbyname(socket.gethostname())
-    except:
-        container_ip = "Unable to determine"
-    
-    # Get Python version
-    import sys
-    python_version = f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}"
+    body, etag = get_page()
+    response = app.response_class(body, mimetype='text/html')
+    response.set_etag(etag)
+    # Browsers revalidate every time; an unchanged page costs a 304 and no body
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+def render_home():
+    # Hostname, IP, Python version and environment (resolved once per worker)
+    identity = get_identity()
     
     # Get current time
     current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
-    # Get environment (from ENV variable or default)
-    environment = os.getenv('APP_ENV', 'development')
-    
-    # Get short container ID (first 12 chars of hostname)
-    container_id = hostname[:12]
-    
-    return render_template_string(
-        HTML_TEMPLATE,
-        hostname=hostname,
-        container_ip=container_ip,
-        python_version=python_version,
+    return HOME_TEMPLATE.render(
+        stylesheet_url=STYLESHEET_URL,
+        hostname=identity.hostname,
+        container_ip=identity.container_ip,
+        python_version=identity.python_version,
         current_time=current_time,
-        environment=environment,
-        container_id=container_id
+        environment=identity.environment,
+        container_id=identity.container_id
     )
 
 @app.route('/health')
@@ -225,23 +188,46 @@ def info():
     """
     Information endpoint that returns container details in JSON format
     """
-    import sys
+    identity = get_identity()
     
     return {
         "message": "Hello Class, welcome to Docker class, how is it going?",
         "container_info": {
-            "hostname": socket.gethostname(),
-            "ip_address": socket.gethostbyname(socket.gethostname()),
-            "python_version": f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}",
+            "hostname": identity.hostname,
+            "ip_address": identity.container_ip,
+            "python_version": identity.python_version,
             "timestamp": datetime.now().isoformat(),
-            "environment": os.getenv('APP_ENV', 'development')
+            "environment": identity.environment
         }
     }
 
+@app.route('/admin/refresh-identity', methods=['POST'])
+def admin_refresh_identity():
+    """
+    Re-resolve hostname/IP for the worker handling this request
+    """
+    if ADMIN_TOKEN:
+        allowed = hmac.compare_digest(request.headers.get('X-Admin-Token', ''), ADMIN_TOKEN)
+    else:
+        allowed = request.remote_addr in ('127.0.0.1', '::1')
+    if not allowed:
+        return {"status": "error", "message": "Forbidden"}, 403
+    
+    identity = refresh_identity()
+    return {
+        "status": "ok",
+        "hostname": identity.hostname,
+        "ip_address": identity.container_ip,
+        "resolved_at": identity.resolved_at
+    }
+
 if __name__ == '__main__':
     # Get port from environment variable or use default
     port = int(os.getenv('PORT', 5000))
     
+    # `kill -HUP <pid>` re-resolves the container identity
+    signal.signal(signal.SIGHUP, refresh_identity)
+    
     # Run Flask app
     # host='0.0.0.0' makes it accessible from outside the container
 
@@ -1,27 +1,115 @@
-from flask import Flask, render_template_string, jsonify
-from datetime import datetime
+from flask import Flask, jsonify, request, g
+from flask.json.provider import DefaultJSONProvider
+import click
+from datetime import datetime, date, timedelta
 import socket
 import os
+import hmac
+import signal
+import hashlib
 import sys
 import json
-import redis
-import mysql.connector
-from mysql.connector import Error
+import re
+import time
+import zlib
+import gzip
+import random
+import cProfile
+import queue
+import atexit
+import threading
+import logging.handlers
+import importlib
+from collections import Counter, deque
+from functools import cache, partial, wraps
+from contextvars import ContextVar, copy_context
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configured in the LOGGING section below
 logger = logging.getLogger(__name__)
 
+class LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access.
+
+    The MySQL and Redis drivers are a third of app2's import time; a
+    process that never calls them (CLI commands, the dev server until the
+    first page) never loads them. importlib's per-module import locks make
+    a first access from several threads at once safe.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def load(self):
+        """Import the module now, if it is not yet"""
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+
+redis = LazyModule('redis')
+mysql_connector = LazyModule('mysql.connector')
+
 app = Flask(__name__)
 
+# Static files are requested with a content-hash query string (see
+# versioned_static_url), so browsers may cache them for a year
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 365 * 24 * 3600
+
 # ============ DATABASE CONFIGURATION ============
 DB_CONFIG = {
     'host': os.getenv('DB_HOST', 'localhost'),
     'user': os.getenv('DB_USER', 'root'),
     'password': os.getenv('DB_PASSWORD', 'root'),
     'database': os.getenv('DB_NAME', 'docker_class'),
-    'port': int(os.getenv('DB_PORT', 3306))
+    'port': int(os.getenv('DB_PORT', 3306)),
+    # Seconds to wait for the server while connecting (and, with the pure
+    # Python connector, for each read/write afterwards)
+    'connection_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', 2))
+}
+
+# Per-worker connection pool settings
+DB_POOL_CONFIG = {
+    'size': int(os.getenv('DB_POOL_SIZE', 5)),
+    'max_overflow': int(os.getenv('DB_POOL_MAX_OVERFLOW', 5)),
+    'timeout': float(os.getenv('DB_POOL_TIMEOUT', 5)),
+    'pre_ping_after': float(os.getenv('DB_POOL_PRE_PING_AFTER', 30))
+}
+
+# Schema bootstrap (`flask --app app2 init-db`): connection attempts back
+# off exponentially from base_delay up to max_delay seconds
+DB_INIT_CONFIG = {
+    'max_attempts': int(os.getenv('DB_INIT_MAX_ATTEMPTS', 10)),
+    'base_delay': float(os.getenv('DB_INIT_BASE_DELAY', 0.5)),
+    'max_delay': float(os.getenv('DB_INIT_MAX_DELAY', 15))
+}
+
+# visits_counter is split into this many slot rows so concurrent writers
+# don't all queue on one InnoDB row lock; 'random' or 'container' picks the slot.
+# Each visits_hourly row (container, hour) is split the same way, always at random
+VISITS_COUNTER_SLOTS = int(os.getenv('VISITS_COUNTER_SLOTS', 16))
+VISITS_COUNTER_SLOT_STRATEGY = os.getenv('VISITS_COUNTER_SLOT_STRATEGY', 'random')
+
+# Raw visits are partitioned by day. `flask --app app2 maintain-visits` drops
+# partitions older than retention_days and pre-creates partitions_ahead days
+VISITS_TABLE_CONFIG = {
+    'retention_days': int(os.getenv('VISITS_RETENTION_DAYS', 30)),
+    'partitions_ahead': int(os.getenv('VISITS_PARTITIONS_AHEAD', 7))
+}
+
+# Visit recording: 'sync' writes inside the request, 'buffered' queues visits
+# for a background flusher that writes them in batches
+VISIT_WRITE_MODE = os.getenv('VISIT_WRITE_MODE', 'sync')
+VISIT_BUFFER_CONFIG = {
+    'batch_size': int(os.getenv('VISIT_BATCH_SIZE', 500)),
+    'flush_interval': float(os.getenv('VISIT_FLUSH_INTERVAL', 1.0)),
+    'max_pending': int(os.getenv('VISIT_QUEUE_MAX', 10000))
 }
 
 # ============ REDIS CACHE CONFIGURATION ============
@@ -32,6 +120,106 @@ REDIS_CONFIG = {
     'decode_responses': True
 }
 
+# Shared client pool settings; dead connections are detected by
+# health_check_interval instead of a PING before every command
+REDIS_POOL_CONFIG = {
+    'max_connections': int(os.getenv('REDIS_POOL_MAX_CONNECTIONS', 20)),
+    'health_check_interval': int(os.getenv('REDIS_HEALTH_CHECK_INTERVAL', 30)),
+    'socket_connect_timeout': float(os.getenv('REDIS_CONNECT_TIMEOUT', 0.5)),
+    'socket_timeout': float(os.getenv('REDIS_SOCKET_TIMEOUT', 1.0))
+}
+
+# Per-dependency circuit breakers: after `failure_threshold` consecutive
+# failed calls the dependency is skipped (helpers return their fallback at
+# once) for `reset_timeout` seconds, randomised by +/- `jitter`; then one
+# probe call decides whether it closes again
+BREAKER_CONFIG = {
+    'failure_threshold': int(os.getenv('BREAKER_FAILURE_THRESHOLD', 3)),
+    'reset_timeout': float(os.getenv('BREAKER_RESET_TIMEOUT', 5)),
+    'jitter': float(os.getenv('BREAKER_JITTER', 0.2))
+}
+
+# Logs are JSON lines on stdout ('text' for plain lines), written by a
+# background thread. A successful request is access-logged with probability
+# access_sample_rate; errors and requests slower than slow_request_ms always
+# are. A repeating dependency error is logged once per error_interval seconds
+LOG_CONFIG = {
+    'level': os.getenv('LOG_LEVEL', 'INFO').upper(),
+    'format': os.getenv('LOG_FORMAT', 'json'),
+    'access_sample_rate': float(os.getenv('LOG_ACCESS_SAMPLE_RATE', 0.01)),
+    'slow_request_ms': float(os.getenv('LOG_SLOW_REQUEST_MS', 1000)),
+    'error_interval': float(os.getenv('LOG_ERROR_INTERVAL', 10))
+}
+
+# Request tracing: 'off' (nothing is wrapped), 'header' (requests sending
+# X-Profile: 1 that pass admin_authorized) or 'all'. Traced requests of at
+# least slow_ms are kept in a per-worker ring buffer served at /debug/slow.
+# With cprofile_every = N, every Nth request is also run under cProfile and
+# its stats dumped into cprofile_dir
+PROFILING_CONFIG = {
+    'mode': os.getenv('PROFILE_MODE', 'off'),
+    'slow_ms': float(os.getenv('PROFILE_SLOW_MS', 500)),
+    'buffer_size': int(os.getenv('PROFILE_BUFFER_SIZE', 50)),
+    'cprofile_every': int(os.getenv('PROFILE_CPROFILE_EVERY', 0)),
+    'cprofile_dir': os.getenv('PROFILE_CPROFILE_DIR', '/tmp/app2-profiles')
+}
+
+# Independent dependency calls in a request run concurrently on a shared,
+# bounded thread pool; each dependency gets its own deadline (seconds)
+FANOUT_CONFIG = {
+    'max_workers': int(os.getenv('FANOUT_MAX_WORKERS', 16)),
+    'db_timeout': float(os.getenv('FANOUT_DB_TIMEOUT', 2.0)),
+    'redis_timeout': float(os.getenv('FANOUT_REDIS_TIMEOUT', 0.5))
+}
+
+# Dependency health is checked in the background every `interval` seconds;
+# a result older than `max_staleness` seconds no longer counts as ready
+HEALTH_CONFIG = {
+    'interval': float(os.getenv('HEALTH_CHECK_INTERVAL', 10)),
+    'max_staleness': float(os.getenv('HEALTH_MAX_STALENESS', 30))
+}
+
+# Total visits are read through a per-worker cache (local_ttl seconds) backed
+# by a shared Redis copy that is trusted for max_staleness seconds
+TOTAL_VISITS_CACHE_CONFIG = {
+    'local_ttl': float(os.getenv('TOTAL_VISITS_LOCAL_TTL', 1.0)),
+    'max_staleness': float(os.getenv('TOTAL_VISITS_MAX_STALENESS', 5.0)),
+    'lock_timeout': float(os.getenv('TOTAL_VISITS_LOCK_TIMEOUT', 2.0)),
+    'local_increments': os.getenv('TOTAL_VISITS_LOCAL_INCREMENTS', '1') == '1'
+}
+
+# Sorted set of live request:* keys, scored by expiry time (epoch seconds);
+# filled by `flask --app app2 reconcile-cache`, which should run periodically
+CACHED_REQUESTS_INDEX = 'requests:index'
+
+# Responses of a compressible type and at least `min_size` bytes are gzip-
+# or brotli-compressed per Accept-Encoding. Static files and the cached home
+# page are compressed once at `static_level`; other responses per request
+# at `gzip_level` / `brotli_quality`
+COMPRESSION_CONFIG = {
+    'enabled': os.getenv('COMPRESS_RESPONSES', '1') == '1',
+    'min_size': int(os.getenv('COMPRESS_MIN_SIZE', 500)),
+    'gzip_level': int(os.getenv('COMPRESS_GZIP_LEVEL', 6)),
+    'brotli_quality': int(os.getenv('COMPRESS_BROTLI_QUALITY', 4))
+}
+
+# Page views are also counted in per-minute and per-hour Redis hashes
+# (visits:<resolution>:<bucket start>, one field per container plus '*'),
+# which expire after the given number of seconds
+VISIT_BUCKETS = {'minute': 60, 'hour': 3600}
+VISIT_STATS_CONFIG = {
+    'minute_ttl': int(os.getenv('VISIT_STATS_MINUTE_TTL', 24 * 3600)),
+    'hour_ttl': int(os.getenv('VISIT_STATS_HOUR_TTL', 30 * 24 * 3600))
+}
+
+# The rendered home page is reused for `ttl` seconds per worker (0 renders
+# every request); cached pages poll /api/live every `poll_interval` seconds
+# for the counters that must stay current
+PAGE_CACHE_CONFIG = {
+    'ttl': float(os.getenv('PAGE_CACHE_TTL', 0)),
+    'poll_interval': float(os.getenv('PAGE_LIVE_POLL_INTERVAL', 5))
+}
+
 # ============ HTML TEMPLATE ============
 HTML_TEMPLATE = """
 <!DOCTYPE html>
@@ -40,186 +228,7 @@ HTML_TEMPLATE = """
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Docker Class Demo - Multi-Container App</title>
-    <style>
-        * {
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }
-        
-        body {
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            display: flex;
-            justify-content: center;
-            align-items: center;
-            padding: 20px;
-        }
-        
-        .container {
-            background: white;
-            border-radius: 20px;
-            padding: 50px;
-            box-shadow: 0 20px 60px rgba(0, 0, 0, 0.3);
-            text-align: center;
-            max-width: 800px;
-            animation: fadeIn 0.6s ease-in;
-        }
-        
-        @keyframes fadeIn {
-            from {
-                opacity: 0;
-                transform: translateY(-20px);
-            }
-            to {
-                opacity: 1;
-                transform: translateY(0);
-            }
-        }
-        
-        .docker-icon {
-            font-size: 80px;
-            margin-bottom: 20px;
-        }
-        
-        h1 {
-            color: #2c3e50;
-            font-size: 2.5em;
-            margin-bottom: 20px;
-            line-height: 1.3;
-        }
-        
-        .welcome-text {
-            color: #667eea;
-            font-size: 1.8em;
-            font-weight: bold;
-            margin-bottom: 15px;
-        }
-        
-        .message {
-            color: #555;
-            font-size: 1.3em;
-            margin-bottom: 30px;
-        }
-        
-        .services-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-            gap: 20px;
-            margin-top: 30px;
-            margin-bottom: 30px;
-        }
-        
-        .service-card {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 20px;
-            border-radius: 10px;
-            text-align: center;
-        }
-        
-        .service-card h3 {
-            margin-bottom: 10px;
-            font-size: 1.2em;
-        }
-        
-        .service-icon {
-            font-size: 40px;
-            margin-bottom: 10px;
-        }
-        
-        .service-status {
-            font-size: 0.9em;
-            opacity: 0.9;
-        }
-        
-        .info-box {
-            background: #f8f9fa;
-            border-left: 4px solid #667eea;
-            padding: 20px;
-            margin: 20px 0;
-            text-align: left;
-            border-radius: 8px;
-        }
-        
-        .info-box h3 {
-            color: #2c3e50;
-            margin-bottom: 15px;
-            font-size: 1.2em;
-        }
-        
-        .info-item {
-            display: flex;
-            justify-content: space-between;
-            padding: 8px 0;
-            border-bottom: 1px solid #e0e0e0;
-        }
-        
-        .info-item:last-child {
-            border-bottom: none;
-        }
-        
-        .info-label {
-            font-weight: bold;
-            color: #555;
-        }
-        
-        .info-value {
-            color: #667eea;
-            font-family: 'Courier New', monospace;
-            word-break: break-all;
-        }
-        
-        .status-badge {
-            display: inline-block;
-            padding: 5px 12px;
-            border-radius: 20px;
-            font-size: 0.85em;
-            font-weight: bold;
-            margin-left: 10px;
-        }
-        
-        .status-ok {
-            background: #10b981;
-            color: white;
-        }
-        
-        .status-error {
-            background: #ef4444;
-            color: white;
-        }
-        
-        .status-warning {
-            background: #f59e0b;
-            color: white;
-        }
-        
-        .footer {
-            margin-top: 30px;
-            color: #999;
-            font-size: 0.9em;
-            border-top: 1px solid #e0e0e0;
-            padding-top: 20px;
-        }
-        
-        .request-counter {
-            background: #667eea;
-            color: white;
-            padding: 20px;
-            border-radius: 10px;
-            margin-top: 20px;
-        }
-        
-        .request-counter h3 {
-            margin-bottom: 10px;
-        }
-        
-        .counter-value {
-            font-size: 2em;
-            font-weight: bold;
-        }
-    </style>
+    <link rel="stylesheet" href="{{ stylesheet_url }}">
 </head>
 <body>
     <div class="container">
@@ -264,7 +273,7 @@ HTML_TEMPLATE = """
             </div>
             <div class="info-item">
                 <span class="info-label">Current Time:</span>
-                <span class="info-value">{{ current_time }}</span>
+                <span class="info-value" id="current-time">{{ current_time }}</span>
             </div>
             <div class="info-item">
                 <span class="info-label">Environment:</span>
@@ -285,7 +294,7 @@ HTML_TEMPLATE = """
             </div>
             <div class="info-item">
                 <span class="info-label">Total Visits (from DB):</span>
-                <span class="info-value">{{ total_visits }}</span>
+                <span class="info-value" id="total-visits">{{ total_visits }}</span>
             </div>
         </div>
         
@@ -298,14 +307,14 @@ HTML_TEMPLATE = """
             </div>
             <div class="info-item">
                 <span class="info-label">Cached Requests:</span>
-                <span class="info-value">{{ cached_requests }}</span>
+                <span class="info-value" id="cached-requests">{{ cached_requests }}</span>
             </div>
         </div>
         
         <!-- Request Counter -->
         <div class="request-counter">
             <h3>📈 Page Views (from Cache)</h3>
-            <div class="counter-value">{{ page_views }}</div>
+            <div class="counter-value" id="page-views">{{ page_views }}</div>
         </div>
         
         <div class="footer">
@@ -313,276 +322,2393 @@ HTML_TEMPLATE = """
             <p><strong>Container ID:</strong> {{ container_id }} | <strong>Loaded at:</strong> {{ loaded_time }}</p>
         </div>
     </div>
+    {% if live_url %}
+    <script>
+        // The page itself may come from the page cache; keep the counters live
+        setInterval(function () {
+            fetch("{{ live_url }}", {cache: "no-store"})
+                .then(function (response) { return response.json(); })
+                .then(function (live) {
+                    Object.keys(live).forEach(function (name) {
+                        var element = document.getElementById(name.replace(/_/g, "-"));
+                        if (element) { element.textContent = live[name]; }
+                    });
+                })
+                .catch(function () {});
+        }, {{ poll_interval_ms }});
+    </script>
+    {% endif %}
 </body>
 </html>
 """
 
-# ============ DATABASE FUNCTIONS ============
+def versioned_static_url(filename):
+    """URL of a static file with its content hash appended for cache busting"""
+    with open(os.path.join(app.static_folder, filename), 'rb') as f:
+        digest = hashlib.md5(f.read()).hexdigest()[:12]
+    return f"{app.static_url_path}/{filename}?v={digest}"
 
-def get_db_connection():
-    """Get MySQL database connection"""
-    try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        return connection
-    except Error as e:
-        logger.error(f"Database connection error: {e}")
-        return None
+# Compiled once at import; render_template_string would re-parse it per request
+HOME_TEMPLATE = app.jinja_env.from_string(HTML_TEMPLATE)
+STYLESHEET_URL = versioned_static_url('app2.css')
 
-def init_database():
-    """Initialize database tables on startup"""
-    for attempt in range(5):
-        conn = get_db_connection()
-        if not conn:
-            logger.warning(f"Database connection attempt {attempt + 1} failed, retrying...")
-            import time
-            time.sleep(5)
-            continue
-        
-        cursor = conn.cursor()
-        try:
-            # Create visits table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS visits (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    container_id VARCHAR(255),
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    user_agent VARCHAR(500),
-                    ip_address VARCHAR(45)
-                )
-            ''')
-            
-            # Create visits_counter table for total count
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS visits_counter (
-                    id INT PRIMARY KEY DEFAULT 1,
-                    total_count INT DEFAULT 0,
-                    last_updated DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Initialize counter if doesn't exist
-            cursor.execute('SELECT COUNT(*) FROM visits_counter')
-            if cursor.fetchone()[0] == 0:
-                cursor.execute('INSERT INTO visits_counter (id, total_count) VALUES (1, 0)')
-            
-            conn.commit()
-            logger.info("Database initialized successfully")
-            return True
-        except Error as e:
-            logger.error(f"Database initialization error: {e}")
-            return False
-        finally:
-            cursor.close()
-            conn.close()
-    
-    logger.error("Failed to initialize database after 5 attempts")
-    return False
+# ============ JSON ============
 
-def record_visit(container_id, user_agent="", ip_address=""):
-    """Record a visit in the database"""
-    try:
-        conn = get_db_connection()
-        if not conn:
-            return False
-        
-        cursor = conn.cursor()
-        
-        # Insert visit record
-        query = '''
-            INSERT INTO visits (container_id, user_agent, ip_address)
-            VALUES (%s, %s, %s)
-        '''
-        cursor.execute(query, (container_id, user_agent, ip_address))
-        
-        # Update counter
-        cursor.execute('UPDATE visits_counter SET total_count = total_count + 1 WHERE id = 1')
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
-        return True
-    except Error as e:
-        logger.error(f"Error recording visit: {e}")
-        return False
+# Optional dependency (requirements-speed.txt): orjson encodes API responses
+# and log lines several times faster than the json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-def get_total_visits():
-    """Get total visits from database"""
-    try:
-        conn = get_db_connection()
-        if not conn:
-            return 0
-        
-        cursor = conn.cursor()
-        cursor.execute('SELECT total_count FROM visits_counter WHERE id = 1')
-        result = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        
-        return result[0] if result else 0
-    except Error as e:
-        logger.error(f"Error getting total visits: {e}")
-        return 0
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask's JSON provider with orjson doing the encoding.
 
-# ============ REDIS CACHE FUNCTIONS ============
+    Dates, Decimals, UUIDs and dataclasses are passed through to Flask's own
+    default(), so responses carry the same values as without orjson; only
+    the whitespace and escaping of non-ASCII text differ. Decoding is left
+    to the json module. Quart uses the same provider interface.
+    """
 
-def get_redis_connection():
-    """Get Redis connection"""
-    try:
-        r = redis.Redis(**REDIS_CONFIG)
-        r.ping()
-        return r
-    except Exception as e:
-        logger.error(f"Redis connection error: {e}")
-        return None
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=kwargs.get('default', self.default), option=option).decode()
 
-def increment_page_views():
-    """Increment page view counter in Redis"""
-    try:
-        r = get_redis_connection()
-        if r:
-            views = r.incr('page_views')
-            return views
-    except Exception as e:
-        logger.error(f"Error incrementing page views: {e}")
-    return 0
+if orjson is not None:
+    app.json = OrjsonProvider(app)
 
-def get_page_views():
-    """Get page view count from Redis"""
-    try:
-        r = get_redis_connection()
-        if r:
-            views = r.get('page_views')
-            return int(views) if views else 0
-    except Exception as e:
-        logger.error(f"Error getting page views: {e}")
-    return 0
+# ============ LOGGING ============
 
-def get_cached_requests_count():
-    """Get number of cached requests"""
-    try:
-        r = get_redis_connection()
-        if r:
-            # Get all keys that start with 'request:'
-            keys = r.keys('request:*')
-            return len(keys)
-    except Exception as e:
-        logger.error(f"Error getting cached requests: {e}")
-    return 0
+# ID of the request being handled; fan_out() copies it into its threads
+_request_id = ContextVar('request_id', default='-')
 
-# ============ ROUTES ============
+# Accepted from an upstream proxy's X-Request-ID, otherwise generated
+REQUEST_ID_PATTERN = re.compile(r'[A-Za-z0-9._-]{1,64}')
 
-@app.route('/')
-def home():
+class RequestIdFilter(logging.Filter):
+    """Stamps records with the current request ID, in the thread that logs them"""
+
+    def filter(self, record):
+        record.request_id = _request_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record; extra={'fields': {...}} adds keys"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', '-'),
+            'pid': record.process
+        }
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        if orjson is not None:
+            return orjson.dumps(entry, default=str, option=orjson.OPT_PASSTHROUGH_DATETIME).decode()
+        return json.dumps(entry, default=str)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
     """
-    Main route that displays welcome message with container and service information
+    Hands records to the writer thread unformatted.
+
+    The stock QueueHandler formats in the calling thread; here only a
+    traceback is rendered up front, because it refers to live frames.
     """
-    # Container information
-    hostname = socket.gethostname()
-    try:
-        container_ip = socket.gethostbyname(socket.gethostname())
-    except:
-        container_ip = "Unable to determine"
-    
-    python_version = f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}"
-    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    environment = os.getenv('APP_ENV', 'development')
-    container_id = hostname[:12]
-    loaded_time = datetime.now().strftime("%H:%M:%S")
-    
-    # Database status and info
-    conn = get_db_connection()
-    db_status = "Connected ✓" if conn else "Disconnected ✗"
-    db_status_class = "status-ok" if conn else "status-error"
-    if conn:
-        conn.close()
-    
-    total_visits = get_total_visits()
-    db_host = DB_CONFIG['host']
-    db_name = DB_CONFIG['database']
-    
-    # Redis cache status
-    redis_conn = get_redis_connection()
-    redis_status = "Connected ✓" if redis_conn else "Disconnected ✗"
-    redis_status_class = "status-ok" if redis_conn else "status-error"
-    redis_host = REDIS_CONFIG['host']
-    
-    # Page views and cached requests
-    page_views = increment_page_views()
-    cached_requests = get_cached_requests_count()
-    
-    # Record this visit in database
-    record_visit(container_id)
-    
-    return render_template_string(
-        HTML_TEMPLATE,
-        hostname=hostname,
-        container_ip=container_ip,
-        python_version=python_version,
-        current_time=current_time,
-        environment=environment,
-        container_id=container_id,
-        loaded_time=loaded_time,
-        db_status=db_status,
-        db_status_class=db_status_class,
-        db_host=db_host,
-        db_name=db_name,
-        total_visits=total_visits,
-        redis_status=redis_status,
-        redis_status_class=redis_status_class,
-        redis_host=redis_host,
-        page_views=page_views,
-        cached_requests=cached_requests
-    )
 
-@app.route('/health')
-def health():
+    def prepare(self, record):
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class ErrorLogLimiter:
     """
-    Health check endpoint for container monitoring
-    Checks all three services
+    Lets a repeating error through once per `interval` seconds.
+
+    Keys are small tuples (dependency, helper, exception type). Repeats in
+    between are only counted and reported with the next one let through.
     """
-    db_ok = get_db_connection() is not None
-    redis_ok = get_redis_connection() is not None
-    
-    status = "healthy" if (db_ok and redis_ok) else "degraded"
-    
-    return jsonify({
-        "status": status,
-        "timestamp": datetime.now().isoformat(),
-        "service": "flask-docker-demo",
-        "version": "2.0.0",
-        "services": {
-            "database": "ok" if db_ok else "failed",
-            "redis": "ok" if redis_ok else "failed"
-        }
-    })
 
-@app.route('/info')
-def info():
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._seen = {}
+
+    def allow(self, key):
+        """(log it?, repeats suppressed since the last one logged)"""
+        if self.interval <= 0:
+            return True, 0
+        now = time.monotonic()
+        with self._lock:
+            entry = self._seen.get(key)
+            if entry is None or now >= entry[0]:
+                self._seen[key] = [now + self.interval, 0]
+                return True, entry[1] if entry else 0
+            entry[1] += 1
+            return False, 0
+
+
+def configure_logging():
+    """Route the root logger through a queue to a stdout writer thread"""
+    stream = logging.StreamHandler(sys.stdout)
+    if LOG_CONFIG['format'] == 'json':
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter('%(levelname)s:%(name)s:[%(request_id)s] %(message)s'))
+    handler = DeferredQueueHandler(queue.SimpleQueue())
+    handler.addFilter(RequestIdFilter())
+    logging.basicConfig(level=LOG_CONFIG['level'], handlers=[handler])
+    return handler, logging.handlers.QueueListener(handler.queue, stream)
+
+log_handler, log_writer = configure_logging()
+log_writer.start()
+
+def _restart_log_writer():
+    # The writer thread does not survive a fork; the child gets its own
+    # queue (the parent's may have been locked mid-put) and thread
+    global log_writer
+    log_handler.queue = queue.SimpleQueue()
+    log_writer = logging.handlers.QueueListener(log_handler.queue, *log_writer.handlers)
+    log_writer.start()
+
+def stop_log_writer():
+    """Write out queued records and stop the writer thread"""
+    if log_writer._thread is not None:
+        log_writer.stop()
+
+os.register_at_fork(after_in_child=_restart_log_writer)
+atexit.register(stop_log_writer)
+
+error_log_limiter = ErrorLogLimiter(LOG_CONFIG['error_interval'])
+access_logger = logging.getLogger('app2.access')
+
+@app.before_request
+def _assign_request_id():
+    incoming = request.headers.get('X-Request-ID', '')
+    g.request_id = incoming if REQUEST_ID_PATTERN.fullmatch(incoming) else os.urandom(8).hex()
+    g.request_id_token = _request_id.set(g.request_id)
+    g.log_started = time.perf_counter()
+
+@app.after_request
+def _log_request(response):
+    # Registered before the compression hook, so it runs after it and
+    # sees the bytes actually sent
+    request_id = g.get('request_id')
+    if request_id is None:
+        return response
+    response.headers['X-Request-ID'] = request_id
+    duration_ms = (time.perf_counter() - g.log_started) * 1000
+    if (response.status_code >= 400 or duration_ms >= LOG_CONFIG['slow_request_ms']
+            or random.random() < LOG_CONFIG['access_sample_rate']):
+        access_logger.info(f"{request.method} {request.path} {response.status_code}", extra={'fields': {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(duration_ms, 3),
+            'bytes': response.content_length,
+            'remote_addr': request.remote_addr
+        }})
+    return response
+
+@app.teardown_request
+def _forget_request_id(_exc=None):
+    token = g.pop('request_id_token', None)
+    if token is not None:
+        _request_id.reset(token)
+
+# ============ COMPRESSION ============
+
+# Optional dependency: without Brotli only gzip is offered
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = {'text/html', 'text/css', 'text/plain', 'application/json', 'application/javascript'}
+
+def compress(data, encoding, static=False):
+    """Encode `data`; static=True spends the highest level, for content compressed once"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=11 if static else COMPRESSION_CONFIG['brotli_quality'])
+    return gzip.compress(data, compresslevel=9 if static else COMPRESSION_CONFIG['gzip_level'], mtime=0)
+
+def available_encodings():
+    """Encodings this process can produce, in order of preference"""
+    if not COMPRESSION_CONFIG['enabled']:
+        return []
+    return ['br', 'gzip'] if brotli else ['gzip']
+
+def negotiate_encoding(offered):
+    """Best of `offered` per the request's Accept-Encoding, or None for identity"""
+    return request.accept_encodings.best_match(offered) if offered else None
+
+def compressed_variants(data, static=False):
+    """{encoding: body} for `data`, with 'identity'; encodings that do not shrink it are left out"""
+    variants = {'identity': data}
+    if len(data) >= COMPRESSION_CONFIG['min_size']:
+        for encoding in available_encodings():
+            encoded = compress(data, encoding, static)
+            if len(encoded) < len(data):
+                variants[encoding] = encoded
+    return variants
+
+def variant_response(variants, mimetype, etag):
     """
-    Information endpoint that returns container and service details in JSON format
+    Response with the best of precompressed `variants` for this request.
+
+    Encoded bodies carry a weak ETag: If-None-Match is compared weakly, so
+    revalidation still yields a 304 whichever encoding the client holds.
     """
-    hostname = socket.gethostname()
-    
-    db_conn = get_db_connection()
-    db_status = "connected" if db_conn else "disconnected"
-    if db_conn:
-        db_conn.close()
-    
-    redis_conn = get_redis_connection()
-    redis_status = "connected" if redis_conn else "disconnected"
-    
-    return jsonify({
-        "message": "Multi-container Docker application demo",
-        "application": {
+    encoding = negotiate_encoding([name for name in variants if name != 'identity'])
+    response = app.response_class(variants[encoding or 'identity'], mimetype=mimetype)
+    response.set_etag(etag, weak=encoding is not None)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+def minify_css(text):
+    """Drop comments and insignificant whitespace from a stylesheet"""
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\s*([{};,>])\s*', r'\1', text)
+    return text.replace(';}', '}').strip()
+
+def load_static_assets():
+    """Minify and precompress every stylesheet once; {filename: (variants, etag)}"""
+    assets = {}
+    for filename in os.listdir(app.static_folder):
+        if not filename.endswith('.css'):
+            continue
+        with open(os.path.join(app.static_folder, filename), encoding='utf-8') as f:
+            data = minify_css(f.read()).encode('utf-8')
+        assets[filename] = (compressed_variants(data, static=True), hashlib.md5(data).hexdigest())
+    return assets
+
+STATIC_ASSETS = load_static_assets()
+
+def serve_static(filename):
+    """Static files from memory, already minified and compressed; others from disk"""
+    if filename not in STATIC_ASSETS:
+        return app.send_static_file(filename)
+    variants, etag = STATIC_ASSETS[filename]
+    response = variant_response(variants, 'text/css', etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = app.config['SEND_FILE_MAX_AGE_DEFAULT']
+    return response.make_conditional(request)
+
+app.view_functions['static'] = serve_static
+
+@app.after_request
+def _compress_response(response):
+    # Dynamic responses: whatever was not precompressed above
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+    data = response.get_data()
+    if len(data) < COMPRESSION_CONFIG['min_size']:
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding(available_encodings())
+    if encoding:
+        response.set_data(compress(data, encoding))
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+    return response
+
+# ============ CIRCUIT BREAKERS ============
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a dependency whose breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open breaker for one dependency, per worker.
+
+    Closed: calls go through; `failure_threshold` consecutive failures open
+    it. Open: allow() refuses every call until the jittered reset timeout
+    has passed, so workers do not all probe a recovering server at once.
+    Half-open: a single probe call is let through; its success closes the
+    breaker, its failure opens it again. A probe that never reports back
+    is replaced after another reset timeout.
+    """
+
+    def __init__(self, name, failure_threshold=3, reset_timeout=5.0, jitter=0.2):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.jitter = jitter
+        self._lock = threading.Lock()
+        self.state = 'closed'
+        self._failures = 0
+        self._retry_at = 0.0
+        self._probe_started = 0.0
+        self._stats = {'opened': 0, 'rejected': 0}
+
+    def allow(self):
+        """True if a call may go to the dependency now"""
+        if self.state == 'closed':
+            return True
+        with self._lock:
+            now = time.monotonic()
+            if self.state == 'open' and now >= self._retry_at:
+                self.state = 'half_open'
+                self._probe_started = now
+                logger.info(f"{self.name} circuit half-open, probing")
+                return True
+            if self.state == 'half_open' and now - self._probe_started >= self.reset_timeout:
+                self._probe_started = now
+                return True
+            if self.state == 'closed':
+                return True
+            self._stats['rejected'] += 1
+            return False
+
+    def record_success(self):
+        if self.state == 'closed' and not self._failures:
+            return
+        with self._lock:
+            if self.state != 'closed':
+                logger.info(f"{self.name} circuit closed")
+            self.state = 'closed'
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == 'half_open' or (self.state == 'closed' and self._failures >= self.failure_threshold):
+                delay = self.reset_timeout * random.uniform(1 - self.jitter, 1 + self.jitter)
+                self._retry_at = time.monotonic() + delay
+                self._stats['opened'] += 1
+                logger.warning(f"{self.name} circuit open after {self._failures} failure(s), retrying in {delay:.1f}s")
+                self.state = 'open'
+
+    def stats(self):
+        """State and counters for /info and /health"""
+        retry_in = max(0.0, self._retry_at - time.monotonic()) if self.state == 'open' else 0.0
+        return dict(self._stats, state=self.state, consecutive_failures=self._failures, retry_in=round(retry_in, 3))
+
+
+breakers = {name: CircuitBreaker(name, **BREAKER_CONFIG) for name in ('mysql', 'redis')}
+
+@cache
+def mysql_outage_errors():
+    """
+    MySQL errors that mean the server is unreachable, not that a query was
+    bad (the *TimeoutError classes only exist in newer connectors)
+    """
+    errors = mysql_connector.errors
+    return tuple(
+        getattr(errors, name)
+        for name in ('InterfaceError', 'OperationalError', 'ConnectionTimeoutError', 'ReadTimeoutError', 'WriteTimeoutError')
+        if hasattr(errors, name)
+    )
+
+# ============ PROFILING ============
+
+PROFILING_ENABLED = PROFILING_CONFIG['mode'] in ('header', 'all')
+
+# Innermost open span of the traced request; None when not tracing.
+# fan_out() copies it into its threads, so their spans nest correctly
+_current_span = ContextVar('current_span', default=None)
+
+class Span:
+    """One timed step of a traced request, with the steps it contains"""
+
+    __slots__ = ('name', 'started', 'duration', 'children')
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.duration = None
+        self.children = []
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.started
+
+    def as_dict(self, origin=None):
+        """Tree with offsets from the root's start; unfinished spans have duration_ms None"""
+        origin = self.started if origin is None else origin
+        node = {
+            "name": self.name,
+            "start_ms": round((self.started - origin) * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None
+        }
+        if self.children:
+            node["children"] = [child.as_dict(origin) for child in self.children]
+        return node
+
+
+class Traced:
+    """Context manager timing a block as a child span; a no-op outside traced requests"""
+
+    __slots__ = ('name', 'span', 'token')
+
+    def __init__(self, name):
+        self.name = name
+        self.span = None
+
+    def __enter__(self):
+        parent = _current_span.get()
+        if parent is not None:
+            self.span = Span(self.name)
+            parent.children.append(self.span)
+            self.token = _current_span.set(self.span)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.span is not None:
+            self.span.finish()
+            _current_span.reset(self.token)
+
+
+def traced(name):
+    """Decorator form of Traced"""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with Traced(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+slow_requests = deque(maxlen=PROFILING_CONFIG['buffer_size'])
+_profiled_requests = 0
+
+def _wants_trace():
+    if PROFILING_CONFIG['mode'] == 'all':
+        return True
+    return request.headers.get('X-Profile') == '1' and admin_authorized()
+
+def _start_trace():
+    global _profiled_requests
+    if _wants_trace():
+        g.trace_root = Span(f"{request.method} {request.url_rule.rule if request.url_rule else request.path}")
+        g.trace_token = _current_span.set(g.trace_root)
+    every = PROFILING_CONFIG['cprofile_every']
+    if every:
+        _profiled_requests += 1
+        if _profiled_requests % every == 0:
+            g.profiler = cProfile.Profile()
+            try:
+                g.profiler.enable()
+            except ValueError:
+                # Another profiler is already active in this thread
+                g.pop('profiler')
+
+def _add_server_timing(response):
+    # Browser devtools show these per request
+    root = g.get('trace_root')
+    if root is not None:
+        response.headers['Server-Timing'] = ', '.join(
+            f"{re.sub(r'[^A-Za-z0-9_.-]', '_', span.name)};dur={span.duration * 1000:.3f}"
+            for span in root.children if span.duration is not None
+        )
+        g.trace_status = response.status_code
+    return response
+
+def _finish_trace(_exc=None):
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        os.makedirs(PROFILING_CONFIG['cprofile_dir'], exist_ok=True)
+        filename = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{g.get('request_id', 'request')}.prof"
+        profiler.dump_stats(os.path.join(PROFILING_CONFIG['cprofile_dir'], filename))
+    
+    root = g.pop('trace_root', None)
+    if root is None:
+        return
+    _current_span.reset(g.pop('trace_token'))
+    root.finish()
+    if root.duration * 1000 >= PROFILING_CONFIG['slow_ms']:
+        slow_requests.append({
+            "request_id": g.get('request_id'),
+            "at": datetime.now().isoformat(),
+            "status": g.get('trace_status'),
+            "duration_ms": round(root.duration * 1000, 3),
+            "spans": root.as_dict()
+        })
+
+# Hooks are only installed when something is enabled, so the default costs
+# nothing per request
+if PROFILING_ENABLED or PROFILING_CONFIG['cprofile_every']:
+    app.before_request(_start_trace)
+    app.after_request(_add_server_timing)
+    app.teardown_request(_finish_trace)
+
+# ============ METRICS ============
+
+# Optional dependency: without prometheus_client the app runs with metrics
+# off. Under gunicorn set PROMETHEUS_MULTIPROC_DIR so all workers share
+# their samples through files in that directory (see gunicorn.conf.py).
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:
+    prometheus_client = None
+
+METRICS_ENABLED = prometheus_client is not None
+
+class _NullMetric:
+    """Stand-in used when prometheus_client is not installed"""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount=1):
+        pass
+
+    def observe(self, value):
+        pass
+
+
+if METRICS_ENABLED:
+    REQUEST_COUNT = prometheus_client.Counter(
+        'http_requests_total', 'HTTP requests served', ['route', 'method', 'status'])
+    REQUEST_LATENCY = prometheus_client.Histogram(
+        'http_request_duration_seconds', 'HTTP request latency', ['route'])
+    DEPENDENCY_LATENCY = prometheus_client.Histogram(
+        'dependency_call_duration_seconds', 'MySQL/Redis helper latency', ['dependency', 'operation'],
+        buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5))
+    DEPENDENCY_ERRORS = prometheus_client.Counter(
+        'dependency_errors_total', 'Failed MySQL/Redis calls', ['dependency', 'operation'])
+    CONNECTIONS_OPENED = prometheus_client.Counter(
+        'dependency_connections_opened_total', 'New MySQL/Redis connections', ['dependency'])
+else:
+    REQUEST_COUNT = REQUEST_LATENCY = DEPENDENCY_LATENCY = DEPENDENCY_ERRORS = CONNECTIONS_OPENED = _NullMetric()
+
+# Name of the instrumented helper currently running, used to label errors
+_current_operation = ContextVar('current_operation', default='unknown')
+
+def instrumented(dependency, operation=None):
+    """Decorator timing a MySQL/Redis helper into dependency_call_duration_seconds"""
+    def decorate(fn):
+        name = operation or fn.__name__
+        if PROFILING_ENABLED:
+            fn = traced(f"{dependency}.{name}")(fn)
+        if not METRICS_ENABLED:
+            return fn
+        latency = DEPENDENCY_LATENCY.labels(dependency, name)
+        
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            token = _current_operation.set(name)
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                latency.observe(time.perf_counter() - started)
+                _current_operation.reset(token)
+        return wrapper
+    return decorate
+
+def dependency_error(dependency, message, error):
+    """Log a failed MySQL/Redis call and count it against the running helper"""
+    if isinstance(error, CircuitOpen):
+        # Failing fast on purpose; the breaker counts these as rejected
+        return
+    operation = _current_operation.get()
+    # During an outage every call fails the same way: log it once per interval
+    log_it, suppressed = error_log_limiter.allow((dependency, operation, type(error).__name__))
+    if log_it:
+        repeats = f" (+{suppressed} similar since last logged)" if suppressed else ""
+        logger.error(f"{message}: {error}{repeats}", extra={'fields': {
+            'dependency': dependency,
+            'operation': operation,
+            'suppressed': suppressed
+        }})
+    DEPENDENCY_ERRORS.labels(dependency, operation).inc()
+    # Redis outcomes are fed to its breaker by _tracked, which sees every command
+    if dependency == 'mysql' and isinstance(error, mysql_outage_errors()):
+        breakers['mysql'].record_failure()
+
+@app.before_request
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def _record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_LATENCY.labels(route).observe(time.perf_counter() - started)
+        REQUEST_COUNT.labels(route, request.method, response.status_code).inc()
+    return response
+
+# ============ CONTAINER IDENTITY ============
+
+# Admin endpoints require this token in X-Admin-Token; when unset they only
+# answer requests from the loopback interface
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+
+class ContainerIdentity:
+    """
+    Host details that only change with the container itself.
+
+    Resolved once per worker process instead of on every request, so the
+    page and /info never block on gethostname() or a DNS lookup.
+    """
+
+    def __init__(self):
+        self.hostname = socket.gethostname()
+        try:
+            self.container_ip = socket.gethostbyname(self.hostname)
+        except OSError:
+            self.container_ip = "Unable to determine"
+        self.container_id = self.hostname[:12]
+        self.python_version = f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}"
+        self.environment = os.getenv('APP_ENV', 'development')
+        self.resolved_at = datetime.now().isoformat()
+
+    def as_dict(self):
+        return {
+            "hostname": self.hostname,
+            "container_id": self.container_id,
+            "ip_address": self.container_ip,
+            "python_version": self.python_version,
+            "environment": self.environment,
+            "resolved_at": self.resolved_at
+        }
+
+
+_identity = None
+
+def get_identity():
+    """Return this worker's ContainerIdentity, resolving it on first use"""
+    global _identity
+    if _identity is None:
+        _identity = ContainerIdentity()
+    return _identity
+
+def refresh_identity(*_signal_args):
+    """Re-resolve the identity (also usable as a signal handler)"""
+    global _identity
+    _identity = ContainerIdentity()
+    return _identity
+
+def _forget_identity():
+    global _identity
+    _identity = None
+
+# A preloaded gunicorn master may have resolved it already; each worker
+# re-resolves after the fork, so `kill -HUP <master>` refreshes every worker
+os.register_at_fork(after_in_child=_forget_identity)
+
+def admin_authorized():
+    """Check the caller may use /admin endpoints"""
+    if ADMIN_TOKEN:
+        return hmac.compare_digest(request.headers.get('X-Admin-Token', ''), ADMIN_TOKEN)
+    return request.remote_addr in ('127.0.0.1', '::1')
+
+# ============ DATABASE CONNECTION POOL ============
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection frees up within the checkout timeout"""
+
+
+class PooledConnection:
+    """Proxy around a MySQL connection whose close() hands it back to the pool"""
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        """
+        Return the connection to the pool instead of closing it.
+
+        Helpers invalidate() a connection whose queries failed, so one that
+        is still here went to the server and back: a success for the MySQL
+        circuit breaker. A bare checkout from the idle pool is not.
+        """
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.release(conn)
+            breakers['mysql'].record_success()
+
+    def invalidate(self):
+        """Close the underlying connection for good (e.g. after a broken socket)"""
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.discard(conn)
+
+
+class ConnectionPool:
+    """
+    Thread-safe MySQL connection pool, one per worker process.
+
+    Keeps up to `size` idle connections and allows `max_overflow` extra
+    connections under bursts. Checkout waits up to `timeout` seconds for a
+    free slot. Connections idle for longer than `pre_ping_after` seconds are
+    pinged before being handed out. The pool notices when it is used from a
+    forked child (gunicorn pre-fork) and starts over with fresh connections.
+    """
+
+    def __init__(self, config, size=5, max_overflow=5, timeout=5.0, pre_ping_after=30.0):
+        self.config = config
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.pre_ping_after = pre_ping_after
+        self._reset()
+
+    def _reset(self):
+        # Connections inherited from a parent process are dropped, not closed:
+        # the sockets are shared with the parent and still in use over there.
+        self._pid = os.getpid()
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._open = 0
+        self._checked_out = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._timeouts = 0
+        self._connects = 0
+
+    def _connect(self):
+        with Traced('mysql.connect'):
+            conn = mysql_connector.connect(**self.config)
+        CONNECTIONS_OPENED.labels('mysql').inc()
+        with self._cond:
+            self._connects += 1
+        return conn
+
+    def acquire(self):
+        """Check out a connection, waiting up to `timeout` seconds for one"""
+        if self._pid != os.getpid():
+            self._reset()
+
+        started = time.monotonic()
+        deadline = started + self.timeout
+        conn, last_used = None, None
+        with self._cond:
+            while True:
+                if self._idle:
+                    # LIFO keeps the most recently used connections warm
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._open < self.size + self.max_overflow:
+                    self._open += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(f"No database connection available within {self.timeout}s")
+                self._cond.wait(remaining)
+
+            waited = time.monotonic() - started
+            self._checked_out += 1
+            self._checkouts += 1
+            self._wait_time += waited
+            if waited > 0.001:
+                self._waits += 1
+
+        try:
+            if conn is None:
+                conn = self._connect()
+            elif time.monotonic() - last_used > self.pre_ping_after:
+                try:
+                    conn.ping(reconnect=False)
+                except mysql_connector.Error:
+                    self._close_quietly(conn)
+                    conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._checked_out -= 1
+                self._cond.notify()
+            raise
+
+        return PooledConnection(self, conn)
+
+    def release(self, conn):
+        """Put a checked-out connection back into the idle set"""
+        if self._pid != os.getpid():
+            return
+
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except mysql_connector.Error:
+            self.discard(conn)
+            return
+
+        with self._cond:
+            self._checked_out -= 1
+            if len(self._idle) >= self.size:
+                # Overflow connection: close it rather than keep it idle
+                self._open -= 1
+                self._close_quietly(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def discard(self, conn):
+        """Close a checked-out connection and free its slot"""
+        if self._pid != os.getpid():
+            return
+
+        self._close_quietly(conn)
+        with self._cond:
+            self._open -= 1
+            self._checked_out -= 1
+            self._cond.notify()
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def stats(self):
+        """Snapshot of pool usage for the /info endpoint"""
+        with self._cond:
+            return {
+                "size": self.size,
+                "max_overflow": self.max_overflow,
+                "open": self._open,
+                "checked_out": self._checked_out,
+                "idle": len(self._idle),
+                "checkouts": self._checkouts,
+                "connects": self._connects,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "total_wait_ms": round(self._wait_time * 1000, 3),
+                "avg_wait_ms": round(self._wait_time * 1000 / self._checkouts, 3) if self._checkouts else 0.0
+            }
+
+
+db_pool = ConnectionPool(DB_CONFIG, **DB_POOL_CONFIG)
+
+# ============ DATABASE FUNCTIONS ============
+
+@instrumented('mysql', 'acquire')
+def get_db_connection():
+    """
+    Check out a pooled MySQL connection; call close() to give it back.
+
+    Returns None at once while the MySQL circuit breaker is open. The call
+    that half-opens it pings the server as the probe. Other successes are
+    recorded when the connection comes back intact (see close()).
+    """
+    breaker = breakers['mysql']
+    if not breaker.allow():
+        return None
+    
+    conn = None
+    try:
+        conn = db_pool.acquire()
+        if breaker.state == 'half_open':
+            conn.ping(reconnect=False)
+            breaker.record_success()
+    except (mysql_connector.Error, PoolTimeout) as e:
+        if conn is not None:
+            conn.invalidate()
+        dependency_error('mysql', "Database connection error", e)
+        return None
+    return conn
+
+def init_database(max_attempts=10, base_delay=0.5, max_delay=15.0):
+    """
+    Create the tables and counter slots (idempotent).
+
+    Run once per deployment by the `init-db` command, never by the app
+    workers. While MySQL is still starting up, connection attempts are
+    retried after 0.5s, 1s, 2s, ... (capped at max_delay, with jitter).
+    """
+    for attempt in range(max_attempts):
+        # Straight from the pool: this loop has its own backoff, and the
+        # circuit breaker would turn most of its attempts into no-ops
+        try:
+            conn = db_pool.acquire()
+        except (mysql_connector.Error, PoolTimeout) as e:
+            logger.error(f"Database connection error: {e}")
+            conn = None
+        if not conn:
+            if attempt + 1 < max_attempts:
+                delay = min(max_delay, base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+                logger.warning(f"Database connection attempt {attempt + 1} failed, retrying in {delay:.1f}s...")
+                time.sleep(delay)
+            continue
+        
+        cursor = conn.cursor()
+        try:
+            # Create visits table, partitioned by day. Every unique key of a
+            # partitioned table must contain the partitioning column, hence
+            # the (id, timestamp) primary key
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS visits (
+                    id INT AUTO_INCREMENT,
+                    container_id VARCHAR(255),
+                    timestamp DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    user_agent VARCHAR(500),
+                    ip_address VARCHAR(45),
+                    PRIMARY KEY (id, timestamp),
+                    INDEX idx_container_time (container_id, timestamp)
+                )
+                PARTITION BY RANGE (TO_DAYS(timestamp)) (
+                    PARTITION pmax VALUES LESS THAN MAXVALUE
+                )
+            ''')
+            upgrade_visits_table(cursor)
+            add_visit_partitions(cursor, VISITS_TABLE_CONFIG['partitions_ahead'])
+            
+            # Visits per container per hour, kept up to date by every visit write
+            # and sharded over slot rows like visits_counter (read back with SUM)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS visits_hourly (
+                    container_id VARCHAR(255) NOT NULL,
+                    hour DATETIME NOT NULL,
+                    slot SMALLINT NOT NULL DEFAULT 1,
+                    visits INT NOT NULL DEFAULT 0,
+                    PRIMARY KEY (container_id, hour, slot),
+                    INDEX idx_hour (hour)
+                )
+            ''')
+            upgrade_hourly_rollup_table(cursor)
+            backfill_hourly_rollup(cursor)
+            
+            # Create visits_counter table for total count
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS visits_counter (
+                    id INT PRIMARY KEY DEFAULT 1,
+                    total_count INT DEFAULT 0,
+                    last_updated DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Make sure every counter slot exists; a pre-sharding table keeps
+            # its total in slot 1, so existing counts carry over unchanged
+            cursor.executemany(
+                'INSERT IGNORE INTO visits_counter (id, total_count) VALUES (%s, 0)',
+                [(slot,) for slot in range(1, VISITS_COUNTER_SLOTS + 1)]
+            )
+            
+            conn.commit()
+            logger.info("Database initialized successfully")
+            return True
+        except mysql_connector.Error as e:
+            logger.error(f"Database initialization error: {e}")
+            return False
+        finally:
+            cursor.close()
+            conn.close()
+    
+    logger.error(f"Failed to initialize database after {max_attempts} attempts")
+    return False
+
+def upgrade_visits_table(cursor):
+    """Index and partition a visits table created before partitioning (rebuilds it once)"""
+    cursor.execute('''
+        SELECT COUNT(*) FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'visits' AND INDEX_NAME = 'idx_container_time'
+    ''')
+    if not cursor.fetchone()[0]:
+        logger.info("Adding (container_id, timestamp) index to visits")
+        cursor.execute('''
+            ALTER TABLE visits
+                MODIFY timestamp DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                DROP PRIMARY KEY,
+                ADD PRIMARY KEY (id, timestamp),
+                ADD INDEX idx_container_time (container_id, timestamp)
+        ''')
+    
+    cursor.execute('''
+        SELECT COUNT(*) FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'visits' AND PARTITION_NAME IS NOT NULL
+    ''')
+    if not cursor.fetchone()[0]:
+        # Existing rows land in the first daily partition created next and
+        # expire together with it
+        logger.info("Partitioning visits by day")
+        cursor.execute('''
+            ALTER TABLE visits PARTITION BY RANGE (TO_DAYS(timestamp)) (
+                PARTITION pmax VALUES LESS THAN MAXVALUE
+            )
+        ''')
+
+def visit_partition_days(cursor):
+    """Days that have their own `visits` partition (named pYYYYMMDD), oldest first"""
+    cursor.execute('''
+        SELECT PARTITION_NAME FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'visits' AND PARTITION_NAME LIKE 'p________'
+    ''')
+    return sorted(datetime.strptime(name[1:], '%Y%m%d').date() for (name,) in cursor.fetchall())
+
+def add_visit_partitions(cursor, days_ahead):
+    """
+    Give today and the next `days_ahead` days their own partition.
+
+    New partitions are split off the catch-all `pmax`, which stays empty as
+    long as this runs at least every `days_ahead` days. Returns their names.
+    """
+    existing = visit_partition_days(cursor)
+    latest = existing[-1] if existing else None
+    today = date.today()
+    days = [today + timedelta(days=n) for n in range(days_ahead + 1)]
+    days = [day for day in days if latest is None or day > latest]
+    if not days:
+        return []
+    
+    definitions = ', '.join(
+        f"PARTITION p{day:%Y%m%d} VALUES LESS THAN (TO_DAYS('{day + timedelta(days=1)}'))"
+        for day in days
+    )
+    cursor.execute(
+        f"ALTER TABLE visits REORGANIZE PARTITION pmax INTO "
+        f"({definitions}, PARTITION pmax VALUES LESS THAN MAXVALUE)"
+    )
+    return [f"p{day:%Y%m%d}" for day in days]
+
+def drop_expired_visit_partitions(cursor, retention_days):
+    """Drop partitions holding only visits older than `retention_days`; returns their names"""
+    cutoff = date.today() - timedelta(days=retention_days)
+    expired = [f"p{day:%Y%m%d}" for day in visit_partition_days(cursor) if day < cutoff]
+    if expired:
+        # Metadata-only operation: no row-by-row DELETE, no undo log
+        cursor.execute(f"ALTER TABLE visits DROP PARTITION {', '.join(expired)}")
+    return expired
+
+def maintain_visit_partitions(retention_days, days_ahead):
+    """Retention job: returns (added, dropped) partition names, or None if MySQL is unreachable"""
+    conn = get_db_connection()
+    if not conn:
+        return None
+    
+    cursor = conn.cursor()
+    try:
+        added = add_visit_partitions(cursor, days_ahead)
+        dropped = drop_expired_visit_partitions(cursor, retention_days)
+        return added, dropped
+    except mysql_connector.Error as e:
+        dependency_error('mysql', "Error maintaining visit partitions", e)
+        conn.invalidate()
+        return None
+    finally:
+        cursor.close()
+        conn.close()
+
+def upgrade_hourly_rollup_table(cursor):
+    """Add the slot column to a visits_hourly created before sharding (existing rows become slot 1)"""
+    cursor.execute('''
+        SELECT COUNT(*) FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'visits_hourly' AND COLUMN_NAME = 'slot'
+    ''')
+    if not cursor.fetchone()[0]:
+        logger.info("Sharding visits_hourly over slot rows")
+        cursor.execute('''
+            ALTER TABLE visits_hourly
+                ADD COLUMN slot SMALLINT NOT NULL DEFAULT 1 AFTER hour,
+                DROP PRIMARY KEY,
+                ADD PRIMARY KEY (container_id, hour, slot)
+        ''')
+
+def backfill_hourly_rollup(cursor):
+    """Fill an empty visits_hourly from the raw visits still retained"""
+    cursor.execute('SELECT 1 FROM visits_hourly LIMIT 1')
+    if cursor.fetchone() is not None:
+        return
+    cursor.execute('''
+        INSERT INTO visits_hourly (container_id, hour, visits)
+        SELECT COALESCE(container_id, ''), DATE_FORMAT(timestamp, '%Y-%m-%d %H:00:00'), COUNT(*)
+        FROM visits GROUP BY 1, 2
+        ON DUPLICATE KEY UPDATE visits = VALUES(visits)
+    ''')
+
+def counter_slot(container_id):
+    """Pick the visits_counter row (1..VISITS_COUNTER_SLOTS) to increment"""
+    if VISITS_COUNTER_SLOT_STRATEGY == 'container':
+        return zlib.crc32(container_id.encode()) % VISITS_COUNTER_SLOTS + 1
+    return random.randint(1, VISITS_COUNTER_SLOTS)
+
+# Upsert so that raising VISITS_COUNTER_SLOTS never loses increments,
+# even before init_database() has created the new slot rows
+INCREMENT_COUNTER_SQL = '''
+    INSERT INTO visits_counter (id, total_count) VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE total_count = total_count + VALUES(total_count)
+'''
+
+def increment_visit_counter(cursor, container_id, count=1):
+    """Add `count` visits to one counter slot"""
+    cursor.execute(INCREMENT_COUNTER_SQL, (counter_slot(container_id), count))
+
+INCREMENT_HOURLY_SQL = '''
+    INSERT INTO visits_hourly (container_id, hour, slot, visits) VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE visits = visits + VALUES(visits)
+'''
+
+def visit_hour(timestamp):
+    """Start of the rollup hour a visit at `timestamp` belongs to"""
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+def hourly_rollup_rows(visits):
+    """
+    Aggregate (container_id, timestamp) pairs into INCREMENT_HOURLY_SQL rows.
+
+    Each (container, hour) goes to a random slot row, so the workers of one
+    container do not all wait on the same row lock. Rows come back sorted
+    so concurrent flushes lock rollup rows in the same order and cannot
+    deadlock each other.
+    """
+    counts = Counter((container_id, visit_hour(timestamp)) for container_id, timestamp in visits)
+    return sorted(
+        (container_id, hour, random.randint(1, VISITS_COUNTER_SLOTS), count)
+        for (container_id, hour), count in counts.items()
+    )
+
+def increment_hourly_rollup(cursor, visits):
+    """Add visits, given as (container_id, timestamp) pairs, to visits_hourly"""
+    cursor.executemany(INCREMENT_HOURLY_SQL, hourly_rollup_rows(visits))
+
+class VisitBuffer:
+    """
+    Write-behind buffer for visit records, one per worker process.
+
+    Requests enqueue visits and return immediately. A daemon thread drains
+    the queue every `flush_interval` seconds (or as soon as `batch_size`
+    visits are waiting) with one multi-row INSERT and a single aggregated
+    counter UPDATE per batch. Pending visits are flushed at worker exit.
+    """
+
+    def __init__(self, batch_size=500, flush_interval=1.0, max_pending=10000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._start_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._queue = queue.Queue(maxsize=self.max_pending)
+        self._retry = []
+        self._stop = threading.Event()
+        self._thread = None
+        self._flushed = 0
+        self._batches = 0
+        self._failures = 0
+
+    def add(self, container_id, user_agent="", ip_address=""):
+        """Queue a visit; returns False when the buffer is full"""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((container_id, user_agent, ip_address, datetime.now()))
+            return True
+        except queue.Full:
+            return False
+
+    def _ensure_started(self):
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid != os.getpid():
+                # Forked child: the parent's flusher thread did not survive
+                self._reset()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='visit-flusher', daemon=True)
+                self._thread.start()
+                atexit.register(self.stop)
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._retry or self._collect()
+            if batch:
+                self._flush(batch)
+        self._drain()
+
+    def _collect(self):
+        """Wait up to flush_interval for visits, returning at most batch_size"""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain(self):
+        """Flush everything still queued (called on shutdown)"""
+        batch = self._retry
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        for start in range(0, len(batch), self.batch_size):
+            self._flush(batch[start:start + self.batch_size])
+
+    @instrumented('mysql', 'flush_visits')
+    def _flush(self, batch):
+        self._retry = []
+        conn = get_db_connection()
+        if conn:
+            try:
+                cursor = conn.cursor()
+                cursor.executemany('''
+                    INSERT INTO visits (container_id, user_agent, ip_address, timestamp)
+                    VALUES (%s, %s, %s, %s)
+                ''', batch)
+                increment_visit_counter(cursor, batch[0][0], len(batch))
+                increment_hourly_rollup(cursor, [(visit[0], visit[3]) for visit in batch])
+                conn.commit()
+                cursor.close()
+                self._flushed += len(batch)
+                self._batches += 1
+                return
+            except mysql_connector.Error as e:
+                dependency_error('mysql', f"Error flushing {len(batch)} buffered visits", e)
+                conn.invalidate()
+            finally:
+                conn.close()
+        
+        # Keep the batch for the next round and back off for one interval
+        self._failures += 1
+        self._retry = batch
+        self._stop.wait(self.flush_interval)
+
+    def stop(self, timeout=10):
+        """Stop the flusher and write out pending visits"""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def stats(self):
+        """Snapshot of buffer activity for the /info endpoint"""
+        return {
+            "mode": VISIT_WRITE_MODE,
+            "pending": self._queue.qsize() + len(self._retry),
+            "flushed": self._flushed,
+            "batches": self._batches,
+            "failed_flushes": self._failures
+        }
+
+
+visit_buffer = VisitBuffer(**VISIT_BUFFER_CONFIG)
+
+@instrumented('mysql')
+def record_visit(container_id, user_agent="", ip_address=""):
+    """
+    Record a visit in the database.
+
+    In buffered mode the visit is only queued; if the queue is full it is
+    written synchronously instead of being dropped.
+    """
+    if VISIT_WRITE_MODE == 'buffered' and visit_buffer.add(container_id, user_agent, ip_address):
+        total_visits_cache.note_visit()
+        return True
+    
+    conn = get_db_connection()
+    if not conn:
+        return False
+    
+    try:
+        cursor = conn.cursor()
+        
+        # Insert visit record; the timestamp is taken here, as in buffered
+        # mode, so the raw row and its rollup hour always agree
+        now = datetime.now()
+        query = '''
+            INSERT INTO visits (container_id, user_agent, ip_address, timestamp)
+            VALUES (%s, %s, %s, %s)
+        '''
+        cursor.execute(query, (container_id, user_agent, ip_address, now))
+        
+        # Update counter and hourly rollup
+        increment_visit_counter(cursor, container_id)
+        increment_hourly_rollup(cursor, [(container_id, now)])
+        
+        conn.commit()
+        cursor.close()
+        total_visits_cache.note_visit()
+        return True
+    except mysql_connector.Error as e:
+        dependency_error('mysql', "Error recording visit", e)
+        conn.invalidate()
+        return False
+    finally:
+        conn.close()
+
+@instrumented('mysql')
+def query_total_visits():
+    """Read total visits straight from the database (None if it is unreachable)"""
+    conn = get_db_connection()
+    if not conn:
+        return None
+    
+    try:
+        cursor = conn.cursor()
+        cursor.execute('SELECT COALESCE(SUM(total_count), 0) FROM visits_counter')
+        result = cursor.fetchone()
+        cursor.close()
+        
+        return int(result[0]) if result else 0
+    except mysql_connector.Error as e:
+        dependency_error('mysql', "Error getting total visits", e)
+        conn.invalidate()
+        return None
+    finally:
+        conn.close()
+
+# Window statistics for /api/visits, read from the hourly rollup only
+VISIT_ROLLUP_SQL = {
+    'hourly': '''
+        SELECT hour, SUM(visits) FROM visits_hourly
+        WHERE hour >= %s AND hour < %s{container_filter}
+        GROUP BY hour ORDER BY hour
+    ''',
+    'by_container': '''
+        SELECT container_id, SUM(visits) FROM visits_hourly
+        WHERE hour >= %s AND hour < %s{container_filter}
+        GROUP BY container_id ORDER BY container_id
+    '''
+}
+
+def _parse_time(value):
+    timestamp = datetime.fromisoformat(value)
+    # Rollup hours are stored in local time without a zone
+    return timestamp.astimezone().replace(tzinfo=None) if timestamp.tzinfo else timestamp
+
+def parse_visit_window(args):
+    """
+    Read ?container=, ?since=, ?until= and ?hours= into (container_id, since, until).
+
+    Returns None when none of them is given. `until` (exclusive) defaults
+    to now and `since` to `hours` (default 24) before it; both are widened
+    to whole rollup hours. Raises ValueError for malformed values and for
+    windows reaching past the dates datetime can represent.
+    """
+    if not any(key in args for key in ('container', 'since', 'until', 'hours')):
+        return None
+    
+    try:
+        until = _parse_time(args['until']) if 'until' in args else datetime.now()
+        if 'since' in args:
+            since = _parse_time(args['since'])
+        else:
+            hours = int(args.get('hours', 24))
+            if hours <= 0:
+                raise ValueError("'hours' must be positive")
+            since = until - timedelta(hours=hours)
+        
+        since = visit_hour(since)
+        if visit_hour(until) != until:
+            until = visit_hour(until) + timedelta(hours=1)
+    except OverflowError:
+        raise ValueError("time window is out of range") from None
+    if since >= until:
+        raise ValueError("'since' must be before 'until'")
+    return args.get('container') or None, since, until
+
+def visit_rollup_queries(container_id, since, until):
+    """(sql, params) for the per-hour and per-container sums over a window"""
+    params = [since, until]
+    container_filter = ''
+    if container_id:
+        container_filter = ' AND container_id = %s'
+        params.append(container_id)
+    return [
+        (VISIT_ROLLUP_SQL[name].format(container_filter=container_filter), params)
+        for name in ('hourly', 'by_container')
+    ]
+
+def summarize_visit_rollups(container_id, since, until, hourly_rows, container_rows):
+    """JSON-ready window statistics from the two rollup queries"""
+    return {
+        "container_id": container_id,
+        "since": since.isoformat(),
+        "until": until.isoformat(),
+        "visits": sum(int(visits) for _, visits in hourly_rows),
+        "hourly": [{"hour": hour.isoformat(), "visits": int(visits)} for hour, visits in hourly_rows],
+        "by_container": {container: int(visits) for container, visits in container_rows}
+    }
+
+@instrumented('mysql')
+def query_visit_rollups(container_id, since, until):
+    """Visit statistics for a time window (None if the database is unreachable)"""
+    conn = get_db_connection()
+    if not conn:
+        return None
+    
+    try:
+        cursor = conn.cursor()
+        results = []
+        for sql, params in visit_rollup_queries(container_id, since, until):
+            cursor.execute(sql, params)
+            results.append(cursor.fetchall())
+        cursor.close()
+        
+        return summarize_visit_rollups(container_id, since, until, *results)
+    except mysql_connector.Error as e:
+        dependency_error('mysql', "Error reading visit rollups", e)
+        conn.invalidate()
+        return None
+    finally:
+        conn.close()
+
+@instrumented('cache')
+def get_total_visits():
+    """Get total visits (read through TotalVisitsCache, may lag by a few seconds)"""
+    return total_visits_cache.get()
+
+@instrumented('mysql')
+def check_database():
+    """Ping the database over a pooled connection"""
+    conn = get_db_connection()
+    if not conn:
+        return False
+    
+    try:
+        conn.ping(reconnect=False)
+        return True
+    except mysql_connector.Error as e:
+        dependency_error('mysql', "Database ping failed", e)
+        conn.invalidate()
+        return False
+    finally:
+        conn.close()
+
+# ============ REDIS CACHE FUNCTIONS ============
+
+def _tracked(call, *args, **kwargs):
+    """Run a Redis call through the Redis breaker, recording its outcome in redis_state"""
+    breaker = breakers['redis']
+    if not breaker.allow():
+        raise CircuitOpen("Redis circuit is open")
+    try:
+        result = call(*args, **kwargs)
+    except (redis.ConnectionError, redis.TimeoutError):
+        breaker.record_failure()
+        redis_state['ok'] = False
+        redis_state['last_error'] = time.time()
+        raise
+    except redis.RedisError:
+        # The server answered, just not with success
+        breaker.record_success()
+        redis_state['ok'] = False
+        redis_state['last_error'] = time.time()
+        raise
+    breaker.record_success()
+    redis_state['ok'] = True
+    redis_state['last_success'] = time.time()
+    return result
+
+
+@cache
+def redis_client_classes():
+    """
+    (TrackedRedis, TrackedConnection), defined on first use: subclassing
+    redis-py at import time would import it with app2
+    """
+    class TrackedPipeline(redis.client.Pipeline):
+        """Pipeline whose round trip counts as a command for redis_state"""
+
+        def execute(self, raise_on_error=True):
+            return _tracked(super().execute, raise_on_error)
+
+    class TrackedRedis(redis.Redis):
+        """Redis client that remembers the outcome of its last command"""
+
+        def execute_command(self, *args, **options):
+            return _tracked(super().execute_command, *args, **options)
+
+        def pipeline(self, transaction=True, shard_hint=None):
+            return TrackedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+    class TrackedConnection(redis.Connection):
+        """Redis connection that counts how often the pool has to open one"""
+
+        def connect(self):
+            with Traced('redis.connect'):
+                super().connect()
+
+        def on_connect(self):
+            CONNECTIONS_OPENED.labels('redis').inc()
+            super().on_connect()
+
+    return TrackedRedis, TrackedConnection
+
+
+# Outcome of the most recent Redis command in this worker (None = no command yet)
+redis_state = {'ok': None, 'last_success': None, 'last_error': None}
+
+_redis_client = None
+_redis_client_lock = threading.Lock()
+
+def get_redis_connection():
+    """
+    Get the process-wide Redis client.
+
+    Created lazily on first use so each gunicorn worker builds its own
+    ConnectionPool after the fork. Nothing is sent to Redis here; failures
+    surface on the first real command.
+    """
+    global _redis_client
+    if _redis_client is None:
+        with _redis_client_lock:
+            if _redis_client is None:
+                tracked_redis, tracked_connection = redis_client_classes()
+                pool = redis.ConnectionPool(**{'connection_class': tracked_connection, **REDIS_CONFIG, **REDIS_POOL_CONFIG})
+                _redis_client = tracked_redis(connection_pool=pool)
+    return _redis_client
+
+
+class Deferred:
+    """Reply to a command queued on a RedisBatch"""
+
+    __slots__ = ('_batch', '_fallback', '_convert', '_value', 'done')
+
+    def __init__(self, batch, fallback, convert):
+        self._batch = batch
+        self._fallback = fallback
+        self._convert = convert
+        self._value = None
+        self.done = False
+
+    def _resolve(self, reply):
+        if isinstance(reply, Exception):
+            self._value = self._fallback
+        else:
+            self._value = self._convert(reply) if self._convert else reply
+        self.done = True
+
+    def get(self):
+        """The reply (or the fallback on error), sending the batch first if needed"""
+        if not self.done:
+            self._batch.execute()
+        return self._value
+
+
+class RedisBatch:
+    """
+    Redis commands collected over one request and sent as a single pipeline.
+
+    Helpers queue commands with queue() (or the command name itself, as on
+    a pipeline: batch.incr('x')) and hand back Deferreds. The first
+    Deferred.get() or execute() sends everything queued so far in one
+    round trip; with transaction=True it is wrapped in MULTI/EXEC. A failed
+    command resolves to its fallback instead of raising.
+    """
+
+    def __init__(self, transaction=False):
+        self.transaction = transaction
+        self.error = None
+        self._queued = []
+        self._queue_lock = threading.Lock()
+        self._send_lock = threading.Lock()
+
+    def queue(self, command, *args, fallback=None, convert=None, **kwargs):
+        deferred = Deferred(self, fallback, convert)
+        with self._queue_lock:
+            self._queued.append((command, args, kwargs, deferred))
+        return deferred
+
+    def __getattr__(self, command):
+        if command.startswith('_'):
+            raise AttributeError(command)
+        return partial(self.queue, command)
+
+    def sending(self):
+        """True while a round trip is in flight"""
+        return self._send_lock.locked()
+
+    @instrumented('redis', 'batch')
+    def execute(self):
+        """Send all queued commands in one round trip; False if Redis failed"""
+        # Held for the whole round trip, so a concurrent get() waits for
+        # the replies instead of sending its own pipeline
+        with self._send_lock:
+            with self._queue_lock:
+                queued, self._queued = self._queued, []
+            if not queued:
+                return self.error is None
+            
+            self.error = None
+            try:
+                pipe = get_redis_connection().pipeline(transaction=self.transaction)
+                for command, args, kwargs, _ in queued:
+                    getattr(pipe, command)(*args, **kwargs)
+                replies = pipe.execute(raise_on_error=False)
+            except Exception as e:
+                dependency_error('redis', f"Error sending {len(queued)} batched Redis commands", e)
+                self.error = e
+                replies = [e] * len(queued)
+            
+            for (command, _, _, deferred), reply in zip(queued, replies):
+                if isinstance(reply, Exception) and reply is not self.error:
+                    dependency_error('redis', f"Batched {command.upper()} failed", reply)
+                    self.error = self.error or reply
+                deferred._resolve(reply)
+            return self.error is None
+
+
+# The batch of the request being handled; fan_out() copies it into its threads
+_redis_batch = ContextVar('redis_batch', default=None)
+
+def current_redis_batch():
+    """This request's RedisBatch, or a fresh one outside of requests"""
+    return _redis_batch.get() or RedisBatch()
+
+@app.before_request
+def _open_redis_batch():
+    g.redis_batch_token = _redis_batch.set(RedisBatch())
+
+@app.teardown_request
+def _close_redis_batch(_exc=None):
+    # Writes nobody read the reply of still have to go out
+    batch = _redis_batch.get()
+    if batch is not None:
+        if batch.sending():
+            # fan_out() gave up on a pipeline that is still waiting for Redis;
+            # the response must not wait behind it, so send the rest later
+            get_fanout_executor().submit(copy_context().run, batch.execute)
+        else:
+            batch.execute()
+    token = g.pop('redis_batch_token', None)
+    if token is not None:
+        _redis_batch.reset(token)
+
+@instrumented('redis')
+def check_redis():
+    """Explicitly PING Redis (used by /health only)"""
+    try:
+        return get_redis_connection().ping()
+    except Exception as e:
+        dependency_error('redis', "Redis ping failed", e)
+        return False
+
+def visit_bucket_key(resolution, start):
+    return f'visits:{resolution}:{start}'
+
+def queue_visit_buckets(pipe, container_id, now=None):
+    """Queue the commands counting one visit in its minute and hour buckets"""
+    now = time.time() if now is None else now
+    for resolution, seconds in VISIT_BUCKETS.items():
+        key = visit_bucket_key(resolution, int(now // seconds * seconds))
+        pipe.hincrby(key, container_id, 1)
+        pipe.hincrby(key, '*', 1)
+        pipe.expire(key, VISIT_STATS_CONFIG[f'{resolution}_ttl'])
+
+def queue_page_view(batch=None):
+    """Queue the page view INCR plus this container's time buckets; Deferred view count"""
+    batch = batch or current_redis_batch()
+    views = batch.incr('page_views', fallback=0)
+    queue_visit_buckets(batch, get_identity().container_id)
+    return views
+
+def queue_page_views_read(batch=None):
+    """Queue a read of the page view counter; Deferred count"""
+    batch = batch or current_redis_batch()
+    return batch.get('page_views', fallback=0, convert=lambda views: int(views) if views else 0)
+
+@instrumented('redis')
+def increment_page_views():
+    """Increment page view counter in Redis"""
+    return queue_page_view().get()
+
+@instrumented('redis')
+def get_page_views():
+    """Get page view count from Redis"""
+    return queue_page_views_read().get()
+
+_WINDOW_UNITS = {'m': 60, 'h': 3600, 'd': 86400}
+
+def parse_timeseries_request(args):
+    """
+    Read ?window= (e.g. 30m, 6h, 7d; default 1h), ?resolution= (minute or
+    hour; default minute up to 3h windows) and ?container= into
+    (resolution, bucket starts oldest first, container_id).
+
+    The newest bucket is the current, still filling one. Raises ValueError
+    for malformed values or windows longer than the buckets are kept.
+    """
+    window = args.get('window', '1h')
+    match = re.fullmatch(r'(\d+)([mhd])', window)
+    if not match or int(match[1]) == 0:
+        raise ValueError(f"'window' must look like 30m, 6h or 7d, not '{window}'")
+    seconds = int(match[1]) * _WINDOW_UNITS[match[2]]
+    
+    resolution = args.get('resolution', 'minute' if seconds <= 3 * 3600 else 'hour')
+    if resolution not in VISIT_BUCKETS:
+        raise ValueError("'resolution' must be 'minute' or 'hour'")
+    if seconds > VISIT_STATS_CONFIG[f'{resolution}_ttl']:
+        raise ValueError(f"{resolution} buckets are kept for {VISIT_STATS_CONFIG[f'{resolution}_ttl']}s only")
+    
+    size = VISIT_BUCKETS[resolution]
+    current = int(time.time() // size * size)
+    count = max(1, -(-seconds // size))
+    starts = [current - size * n for n in reversed(range(count))]
+    return resolution, starts, args.get('container') or None
+
+def summarize_visit_timeseries(resolution, starts, container_id, buckets):
+    """
+    JSON-ready series from one reply per bucket: the container's count
+    (HGET) when filtering, otherwise the whole hash (HGETALL)
+    """
+    size = VISIT_BUCKETS[resolution]
+    points = []
+    by_container = Counter()
+    for start, bucket in zip(starts, buckets):
+        if container_id:
+            visits = int(bucket or 0)
+        else:
+            bucket = bucket or {}
+            visits = int(bucket.get('*', 0))
+            by_container.update({field: int(count) for field, count in bucket.items() if field != '*'})
+        points.append({"start": datetime.fromtimestamp(start).isoformat(), "visits": visits})
+    
+    total = sum(point["visits"] for point in points)
+    series = {
+        "resolution": resolution,
+        "container_id": container_id,
+        "since": points[0]["start"],
+        "until": datetime.fromtimestamp(starts[-1] + size).isoformat(),
+        "total": total,
+        "per_minute": round(total / (len(starts) * size / 60), 3),
+        "points": points
+    }
+    if not container_id:
+        series["by_container"] = dict(by_container)
+    return series
+
+@instrumented('redis')
+def get_visit_timeseries(resolution, starts, container_id=None):
+    """Read every bucket of the window in one pipelined round trip (None on error)"""
+    try:
+        pipe = get_redis_connection().pipeline(transaction=False)
+        for start in starts:
+            key = visit_bucket_key(resolution, start)
+            if container_id:
+                pipe.hget(key, container_id)
+            else:
+                pipe.hgetall(key)
+        return summarize_visit_timeseries(resolution, starts, container_id, pipe.execute())
+    except Exception as e:
+        dependency_error('redis', "Error reading visit time series", e)
+        return None
+
+def queue_cached_requests_count(batch=None):
+    """Queue a count of live cached requests (O(log N) read of the index); Deferred count"""
+    batch = batch or current_redis_batch()
+    return batch.zcount(CACHED_REQUESTS_INDEX, time.time(), '+inf', fallback=0)
+
+@instrumented('redis')
+def get_cached_requests_count():
+    """Get number of cached requests (O(log N) read of the index)"""
+    return queue_cached_requests_count().get()
+
+def reconcile_cached_requests(batch_size=1000, pause=0.0):
+    """
+    Rebuild the cached-requests index from the keyspace using SCAN.
+
+    Works in batches of `batch_size` keys (optionally sleeping `pause`
+    seconds between them) so Redis is never blocked for long. The app
+    itself never writes request:* keys; the clients sharing the Redis
+    instance that do are picked up here, so the `reconcile-cache` command
+    is meant to run on a schedule. Returns (indexed, removed) counts.
+    """
+    r = get_redis_connection()
+    indexed = removed = 0
+    
+    # Pass 1: register every live request:* key with its current expiry
+    for keys in _scan_batches(r.scan, 'request:*', batch_size):
+        pipe = r.pipeline(transaction=False)
+        for key in keys:
+            pipe.pttl(key)
+        now = time.time()
+        mapping = {}
+        for key, pttl in zip(keys, pipe.execute()):
+            if pttl == -2:
+                continue  # expired between SCAN and PTTL
+            mapping[key] = now + pttl / 1000 if pttl >= 0 else '+inf'
+        if mapping:
+            r.zadd(CACHED_REQUESTS_INDEX, mapping)
+            indexed += len(mapping)
+        if pause:
+            time.sleep(pause)
+    
+    # Pass 2: drop index members whose keys are gone
+    r.zremrangebyscore(CACHED_REQUESTS_INDEX, '-inf', time.time())
+    zscan = lambda cursor, match, count: r.zscan(CACHED_REQUESTS_INDEX, cursor, match=match, count=count)
+    for members in _scan_batches(zscan, '*', batch_size):
+        keys = [member for member, _ in members]
+        pipe = r.pipeline(transaction=False)
+        for key in keys:
+            pipe.exists(key)
+        missing = [key for key, exists in zip(keys, pipe.execute()) if not exists]
+        if missing:
+            removed += r.zrem(CACHED_REQUESTS_INDEX, *missing)
+        if pause:
+            time.sleep(pause)
+    
+    return indexed, removed
+
+def _scan_batches(scan, match, count):
+    """Yield non-empty batches from a SCAN-family command until the cursor wraps"""
+    cursor = 0
+    while True:
+        cursor, batch = scan(cursor, match=match, count=count)
+        if batch:
+            yield batch
+        if cursor == 0:
+            break
+
+# ============ VISIT TOTAL CACHE ============
+
+class TotalVisitsCache:
+    """
+    Two-tier read-through cache for the visit total.
+
+    Tier 1 is this worker's copy, reused for `local_ttl` seconds. Tier 2 is
+    a Redis hash shared by every worker and container, trusted for
+    `max_staleness` seconds. When the shared copy is too old, only the
+    worker that wins the SET NX lock reloads it from MySQL; everyone else
+    keeps serving the previous value. With `local_increments`, visits this
+    worker records are added on top until the next refresh.
+    """
+
+    REDIS_KEY = 'cache:total_visits'
+    LOCK_KEY = 'cache:total_visits:lock'
+
+    def __init__(self, loader, local_ttl=1.0, max_staleness=5.0, lock_timeout=2.0, local_increments=True):
+        self.loader = loader
+        self.local_ttl = local_ttl
+        self.max_staleness = max_staleness
+        self.lock_timeout = lock_timeout
+        self.local_increments = local_increments
+        self._refresh_lock = threading.Lock()
+        self._value = None
+        self._expires = 0.0
+        self._local_delta = 0
+        self._stats = {'local_hits': 0, 'redis_hits': 0, 'misses': 0, 'stale_served': 0}
+
+    def get(self):
+        if self._value is not None and time.monotonic() < self._expires:
+            self._stats['local_hits'] += 1
+            return self._value + self._local_delta
+        
+        # Single flight within the worker: while one thread refreshes, the
+        # others serve the expired value instead of piling onto Redis/MySQL
+        if not self._refresh_lock.acquire(blocking=self._value is None):
+            self._stats['stale_served'] += 1
+            return self._value + self._local_delta
+        try:
+            if self._value is None or time.monotonic() >= self._expires:
+                self._refresh()
+            return (self._value or 0) + self._local_delta
+        finally:
+            self._refresh_lock.release()
+
+    def note_visit(self):
+        """Count a visit this worker just recorded"""
+        if self.local_increments:
+            self._local_delta += 1
+
+    def _refresh(self):
+        r = get_redis_connection()
+        try:
+            shared = r.hgetall(self.REDIS_KEY)
+        except Exception as e:
+            dependency_error('redis', "Error reading cached total visits", e)
+            shared = {}
+        
+        # A hash missing a field (or from an older layout) counts as a miss
+        try:
+            shared_value, fetched_at = int(shared.get('value')), float(shared.get('fetched_at'))
+        except (TypeError, ValueError):
+            shared = {}
+        
+        if shared and time.time() - fetched_at < self.max_staleness:
+            self._stats['redis_hits'] += 1
+            self._store(shared_value)
+            return
+        
+        # The shared copy is missing or too old: one worker reloads it
+        try:
+            leader = r.set(self.LOCK_KEY, os.getpid(), nx=True, px=int(self.lock_timeout * 1000))
+        except Exception:
+            leader = True
+        if not leader and shared:
+            self._stats['stale_served'] += 1
+            self._store(shared_value)
+            return
+        
+        self._stats['misses'] += 1
+        value = self.loader()
+        if value is None:
+            # Database unreachable: keep whatever we had and retry next round
+            self._expires = time.monotonic() + self.local_ttl
+            return
+        self._store(value)
+        try:
+            pipe = r.pipeline(transaction=False)
+            pipe.hset(self.REDIS_KEY, mapping={'value': value, 'fetched_at': time.time()})
+            if leader:
+                pipe.delete(self.LOCK_KEY)
+            pipe.execute()
+        except Exception as e:
+            dependency_error('redis', "Error caching total visits", e)
+
+    def _store(self, value):
+        self._value = value
+        self._local_delta = 0
+        self._expires = time.monotonic() + self.local_ttl
+
+    def stats(self):
+        """Hit/miss counters for the /info endpoint"""
+        lookups = sum(self._stats.values())
+        hits = lookups - self._stats['misses']
+        return dict(self._stats, hit_ratio=round(hits / lookups, 3) if lookups else 0.0)
+
+
+total_visits_cache = TotalVisitsCache(query_total_visits, **TOTAL_VISITS_CACHE_CONFIG)
+
+# ============ CONCURRENT FAN-OUT ============
+
+_fanout_executor = None
+_fanout_lock = threading.Lock()
+
+def get_fanout_executor():
+    """Return this worker's fan-out thread pool, creating it on first use"""
+    global _fanout_executor
+    if _fanout_executor is None:
+        with _fanout_lock:
+            if _fanout_executor is None:
+                _fanout_executor = ThreadPoolExecutor(
+                    max_workers=FANOUT_CONFIG['max_workers'],
+                    thread_name_prefix='fanout'
+                )
+    return _fanout_executor
+
+def _forget_fanout_executor():
+    # Pool threads do not survive a fork; the child builds its own pool
+    global _fanout_executor
+    _fanout_executor = None
+
+os.register_at_fork(after_in_child=_forget_fanout_executor)
+
+def log_fanout_failure(level, name, message, kind):
+    """Log a fan-out call that timed out or raised, once per interval per (call, kind)"""
+    # A slow dependency makes the same call miss its deadline on every request
+    log_it, suppressed = error_log_limiter.allow(('fanout', name, kind))
+    if log_it:
+        repeats = f" (+{suppressed} similar since last logged)" if suppressed else ""
+        logger.log(level, f"{name} {message}{repeats}", extra={'fields': {
+            'fanout': name,
+            'suppressed': suppressed
+        }})
+
+def fan_out(calls):
+    """
+    Run independent dependency calls concurrently.
+
+    `calls` maps a name to (function, timeout, fallback). Every call gets
+    `timeout` seconds measured from dispatch; a call that is slower, or that
+    raises, yields its fallback instead. Returns (results, timed_out) where
+    timed_out is the set of names that missed their deadline.
+    """
+    executor = get_fanout_executor()
+    started = time.monotonic()
+    # Each call runs in a copy of the caller's context, so it sees the
+    # request's RedisBatch and other context variables
+    tracing = _current_span.get() is not None
+    futures = {
+        name: executor.submit(copy_context().run, traced(f"fanout.{name}")(fn) if tracing else fn)
+        for name, (fn, _, _) in calls.items()
+    }
+    
+    results, timed_out = {}, set()
+    for name, future in futures.items():
+        _, timeout, fallback = calls[name]
+        try:
+            results[name] = future.result(timeout=max(0.0, started + timeout - time.monotonic()))
+        except FutureTimeout:
+            future.cancel()
+            log_fanout_failure(logging.WARNING, name, f"did not finish within {timeout}s, using fallback", 'timeout')
+            results[name] = fallback
+            timed_out.add(name)
+        except Exception as e:
+            log_fanout_failure(logging.ERROR, name, f"failed: {e}", type(e).__name__)
+            results[name] = fallback
+    return results, timed_out
+
+# ============ HEALTH MONITOR ============
+
+class HealthMonitor:
+    """
+    Checks MySQL and Redis on its own schedule and caches the outcome.
+
+    Probe endpoints read the cached snapshot, so orchestrator probes cost
+    no connections at all. The first read in a worker checks synchronously
+    and starts the background thread.
+    """
+
+    def __init__(self, interval=10.0, max_staleness=30.0):
+        self.interval = interval
+        self.max_staleness = max_staleness
+        self._start_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._snapshot = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def check_now(self):
+        """Probe both dependencies concurrently and store the result"""
+        results, _ = fan_out({
+            'database': (check_database, FANOUT_CONFIG['db_timeout'], False),
+            'redis': (check_redis, FANOUT_CONFIG['redis_timeout'], False)
+        })
+        self._snapshot = {
+            'database': results['database'],
+            'redis': results['redis'],
+            'checked_at': time.time()
+        }
+        return self._snapshot
+
+    def snapshot(self):
+        """Latest result, with its age in seconds and a staleness flag"""
+        self._ensure_started()
+        snapshot = self._snapshot or self.check_now()
+        age = time.time() - snapshot['checked_at']
+        return dict(snapshot, age=age, stale=age > self.max_staleness)
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='health-monitor', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check_now()
+            except Exception as e:
+                logger.error(f"Health check failed: {e}")
+
+    def stop(self):
+        self._stop.set()
+
+
+health_monitor = HealthMonitor(**HEALTH_CONFIG)
+
+# The monitor thread does not survive a fork; each worker starts its own
+os.register_at_fork(after_in_child=health_monitor._reset)
+
+# ============ PAGE CACHE ============
+
+class PageCache:
+    """
+    Per-worker micro-cache for one rendered page.
+
+    The body is rendered (and compressed) at most once every `ttl` seconds
+    and served with an ETag derived from it, so a client revalidating with
+    If-None-Match gets a bodiless 304 until the next render. While one
+    thread renders, the others keep serving the previous body.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._render_lock = threading.Lock()
+        self._entry = None
+        self._stats = {'hits': 0, 'renders': 0, 'stale_served': 0}
+
+    def get(self, render):
+        """(variants, etag) of the cached page, calling render() when it expired"""
+        entry = self._entry
+        if entry is not None and time.monotonic() < entry[2]:
+            self._stats['hits'] += 1
+            return entry[:2]
+        
+        if not self._render_lock.acquire(blocking=entry is None):
+            self._stats['stale_served'] += 1
+            return entry[:2]
+        try:
+            entry = self._entry
+            if entry is None or time.monotonic() >= entry[2]:
+                body = render().encode('utf-8')
+                etag = hashlib.md5(body).hexdigest()
+                entry = self._entry = (compressed_variants(body), etag, time.monotonic() + self.ttl)
+                self._stats['renders'] += 1
+            return entry[:2]
+        finally:
+            self._render_lock.release()
+
+    def clear(self):
+        self._entry = None
+
+    def stats(self):
+        """Hit/render counters for the /info endpoint"""
+        return dict(self._stats, ttl=self.ttl)
+
+
+home_page_cache = PageCache(PAGE_CACHE_CONFIG['ttl'])
+
+# ============ WORKER LIFECYCLE ============
+
+def init_worker():
+    """
+    Warm up a freshly forked worker (called from gunicorn's post_worker_init).
+
+    Everything here would otherwise happen lazily on the first request;
+    doing it up front keeps that request from paying for the identity
+    lookup, the first MySQL/Redis connections and thread start-up.
+    """
+    get_identity()
+    get_fanout_executor()
+    get_redis_connection()
+    if VISIT_WRITE_MODE == 'buffered':
+        visit_buffer._ensure_started()
+    # First check runs synchronously and opens one pooled connection to each dependency
+    health_monitor.snapshot()
+    logger.info(f"Worker {os.getpid()} initialised")
+
+def preload_dependencies():
+    """Import the MySQL and Redis drivers up front (gunicorn master, preload_app only)"""
+    redis.load()
+    mysql_connector.load()
+    redis_client_classes()
+
+def shutdown_worker():
+    """Flush buffered visits and stop background threads (gunicorn's worker_exit)"""
+    visit_buffer.stop()
+    health_monitor.stop()
+    stop_log_writer()
+
+# ============ ROUTES ============
+
+@app.route('/')
+def home():
+    """
+    Main route that displays welcome message with container and service information.
+
+    With PAGE_CACHE_TTL set, the rendered page is shared for that long and
+    revalidated by ETag; every hit is still counted.
+    """
+    identity = get_identity()
+    if not PAGE_CACHE_CONFIG['ttl']:
+        return render_home(identity)
+    
+    # Count this visit; the INCR goes out with the request's batch at teardown
+    queue_page_view()
+    fan_out({'record_visit': (partial(record_visit, identity.container_id), FANOUT_CONFIG['db_timeout'], False)})
+    
+    variants, etag = home_page_cache.get(partial(render_home, identity, count_visit=False))
+    response = variant_response(variants, 'text/html', etag)
+    # Browsers revalidate every time; unchanged pages cost a 304 and no body
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+def render_home(identity, count_visit=True):
+    """Render the home page; count_visit=False only reads the counters"""
+    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    loaded_time = datetime.now().strftime("%H:%M:%S")
+    
+    # All Redis commands for the page are queued first and go out as one
+    # pipeline
+    batch = current_redis_batch()
+    page_views = queue_page_view(batch) if count_visit else queue_page_views_read(batch)
+    cached_requests = queue_cached_requests_count(batch)
+    
+    # Database and cache work runs concurrently; a dependency that misses
+    # its deadline only degrades its own section of the page
+    db_timeout = FANOUT_CONFIG['db_timeout']
+    redis_timeout = FANOUT_CONFIG['redis_timeout']
+    calls = {
+        'db_status': (check_database, db_timeout, False),
+        'total_visits': (get_total_visits, db_timeout, "—"),
+        'redis': (batch.execute, redis_timeout, False)
+    }
+    if count_visit:
+        # Record this visit in database
+        calls['record_visit'] = (partial(record_visit, identity.container_id), db_timeout, False)
+    results, timed_out = fan_out(calls)
+    
+    # Database status and info
+    if timed_out & {'db_status', 'total_visits'}:
+        db_status, db_status_class = "Slow ⏱", "status-warning"
+    elif results['db_status']:
+        db_status, db_status_class = "Connected ✓", "status-ok"
+    else:
+        db_status, db_status_class = "Disconnected ✗", "status-error"
+    total_visits = results['total_visits']
+    db_host = DB_CONFIG['host']
+    db_name = DB_CONFIG['database']
+    
+    # Page views and cached requests
+    if 'redis' in timed_out:
+        page_views = cached_requests = "—"
+    else:
+        page_views = page_views.get()
+        cached_requests = cached_requests.get()
+    
+    # Redis cache status, taken from the commands above
+    if 'redis' in timed_out:
+        redis_status, redis_status_class = "Slow ⏱", "status-warning"
+    elif redis_state['ok']:
+        redis_status, redis_status_class = "Connected ✓", "status-ok"
+    else:
+        redis_status, redis_status_class = "Disconnected ✗", "status-error"
+    redis_host = REDIS_CONFIG['host']
+    
+    with Traced('render_template'):
+        return HOME_TEMPLATE.render(
+            stylesheet_url=STYLESHEET_URL,
+            hostname=identity.hostname,
+            container_ip=identity.container_ip,
+            python_version=identity.python_version,
+            current_time=current_time,
+            environment=identity.environment,
+            container_id=identity.container_id,
+            loaded_time=loaded_time,
+            db_status=db_status,
+            db_status_class=db_status_class,
+            db_host=db_host,
+            db_name=db_name,
+            total_visits=total_visits,
+            redis_status=redis_status,
+            redis_status_class=redis_status_class,
+            redis_host=redis_host,
+            page_views=page_views,
+            cached_requests=cached_requests,
+            live_url='/api/live' if PAGE_CACHE_CONFIG['ttl'] else None,
+            poll_interval_ms=int(PAGE_CACHE_CONFIG['poll_interval'] * 1000)
+        )
+
+@app.route('/api/live')
+def live_counters():
+    """Counters the cached home page polls for; keys match its element ids"""
+    batch = current_redis_batch()
+    page_views = queue_page_views_read(batch)
+    cached_requests = queue_cached_requests_count(batch)
+    total_visits = get_total_visits()
+    batch.execute()
+    
+    response = jsonify({
+        "page_views": page_views.get(),
+        "total_visits": total_visits,
+        "cached_requests": cached_requests.get(),
+        "current_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    })
+    response.cache_control.no_store = True
+    return response
+
+@app.route('/health')
+def health():
+    """
+    Health check endpoint for container monitoring
+    Reports the cached state of all three services (see HealthMonitor)
+    """
+    snapshot = health_monitor.snapshot()
+    db_ok = snapshot['database']
+    redis_ok = snapshot['redis']
+    
+    if snapshot['stale']:
+        status = "stale"
+    else:
+        status = "healthy" if (db_ok and redis_ok) else "degraded"
+    
+    return jsonify({
+        "status": status,
+        "timestamp": datetime.now().isoformat(),
+        "checked_at": datetime.fromtimestamp(snapshot['checked_at']).isoformat(),
+        "age_seconds": round(snapshot['age'], 3),
+        "service": "flask-docker-demo",
+        "version": "2.0.0",
+        "services": {
+            "database": "ok" if db_ok else "failed",
+            "redis": "ok" if redis_ok else "failed"
+        },
+        "circuit_breakers": {name: breaker.state for name, breaker in breakers.items()}
+    })
+
+@app.route('/health/live')
+def health_live():
+    """
+    Liveness probe: the worker process is up and serving requests
+    """
+    return jsonify({"status": "alive", "timestamp": datetime.now().isoformat()})
+
+@app.route('/health/ready')
+def health_ready():
+    """
+    Readiness probe: 200 only when both dependencies were reachable at the
+    last background check and that check is recent enough
+    """
+    snapshot = health_monitor.snapshot()
+    ready = snapshot['database'] and snapshot['redis'] and not snapshot['stale']
+    
+    return jsonify({
+        "status": "ready" if ready else "not ready",
+        "age_seconds": round(snapshot['age'], 3),
+        "services": {
+            "database": "ok" if snapshot['database'] else "failed",
+            "redis": "ok" if snapshot['redis'] else "failed"
+        }
+    }), 200 if ready else 503
+
+@app.route('/info')
+def info():
+    """
+    Information endpoint that returns container and service details in JSON format
+    """
+    identity = get_identity()
+    
+    results, timed_out = fan_out({
+        'db_status': (check_database, FANOUT_CONFIG['db_timeout'], False),
+        'total_visits': (get_total_visits, FANOUT_CONFIG['db_timeout'], None),
+        'page_views': (get_page_views, FANOUT_CONFIG['redis_timeout'], None)
+    })
+    db_status = "connected" if results['db_status'] else "disconnected"
+    redis_status = "connected" if redis_state['ok'] else "disconnected"
+    if 'page_views' in timed_out:
+        redis_status = "timeout"
+    if timed_out & {'db_status', 'total_visits'}:
+        db_status = "timeout"
+    
+    return jsonify({
+        "message": "Multi-container Docker application demo",
+        "application": {
             "name": "Docker Class Demo",
             "version": "2.0.0",
-            "environment": os.getenv('APP_ENV', 'development')
+            "environment": identity.environment,
+            "page_cache": home_page_cache.stats()
         },
         "container_info": {
-            "hostname": hostname,
-            "container_id": hostname[:12],
-            "ip_address": socket.gethostbyname(socket.gethostname()),
-            "python_version": f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}",
+            "hostname": identity.hostname,
+            "container_id": identity.container_id,
+            "ip_address": identity.container_ip,
+            "python_version": identity.python_version,
             "timestamp": datetime.now().isoformat()
         },
         "services": {
@@ -590,66 +2716,104 @@ def info():
                 "host": DB_CONFIG['host'],
                 "name": DB_CONFIG['database'],
                 "status": db_status,
-                "total_visits": get_total_visits()
+                "total_visits": results['total_visits'],
+                "total_visits_cache": total_visits_cache.stats(),
+                "pool": db_pool.stats(),
+                "visit_writes": visit_buffer.stats(),
+                "circuit_breaker": breakers['mysql'].stats()
             },
             "cache": {
                 "host": REDIS_CONFIG['host'],
                 "port": REDIS_CONFIG['port'],
                 "status": redis_status,
-                "page_views": get_page_views()
+                "page_views": results['page_views'],
+                "circuit_breaker": breakers['redis'].stats()
             }
         }
     })
 
 @app.route('/api/visits')
 def get_visits():
-    """Get visit statistics from database"""
+    """
+    Get visit statistics from database.
+
+    With ?container=<id>, ?since=/?until= (ISO 8601) or ?hours=<n>, a
+    "window" section adds per-hour and per-container counts from the
+    hourly rollup table.
+    """
     try:
+        window = parse_visit_window(request.args)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid query parameter: {e}"}), 400
+    
+    try:
+        page_views = queue_page_views_read()
         total = get_total_visits()
-        page_views = get_page_views()
         
-        return jsonify({
+        response = {
             "total_visits_in_db": total,
-            "page_views_from_cache": page_views,
+            "page_views_from_cache": page_views.get(),
             "timestamp": datetime.now().isoformat()
-        })
+        }
+        if window:
+            stats = query_visit_rollups(*window)
+            if stats is None:
+                return jsonify({"error": "Visit statistics are unavailable"}), 503
+            response["window"] = stats
+        
+        return jsonify(response)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/visits/timeseries')
+def get_visits_timeseries():
+    """
+    Visits per minute or hour from the Redis time buckets (never MySQL).
+
+    ?window=1h|30m|7d..., ?resolution=minute|hour, ?container=<id>
+    """
+    try:
+        resolution, starts, container_id = parse_timeseries_request(request.args)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid query parameter: {e}"}), 400
+    
+    series = get_visit_timeseries(resolution, starts, container_id)
+    if series is None:
+        return jsonify({"error": "Visit statistics are unavailable"}), 503
+    return jsonify(series)
+
 @app.route('/api/redis-test')
 def redis_test():
     """Test Redis connectivity and basic operations"""
-    try:
-        r = get_redis_connection()
-        if not r:
-            return jsonify({"status": "error", "message": "Redis connection failed"}), 500
-        
-        # Test set/get
-        r.set('test_key', 'test_value')
-        value = r.get('test_key')
-        
-        return jsonify({
-            "status": "ok",
-            "message": "Redis is working",
-            "test_key_value": value,
-            "all_keys_count": len(r.keys('*'))
-        })
-    except Exception as e:
-        return jsonify({"status": "error", "message": str(e)}), 500
+    # SET, GET and DBSIZE in one MULTI/EXEC round trip
+    batch = RedisBatch(transaction=True)
+    batch.set('test_key', 'test_value')
+    value = batch.get('test_key')
+    key_count = batch.dbsize()
+    if not batch.execute():
+        return jsonify({"status": "error", "message": str(batch.error)}), 500
+    
+    return jsonify({
+        "status": "ok",
+        "message": "Redis is working",
+        "test_key_value": value.get(),
+        "all_keys_count": key_count.get()
+    })
 
 @app.route('/api/db-test')
 def db_test():
     """Test database connectivity"""
+    conn = get_db_connection()
+    if not conn:
+        return jsonify({"status": "error", "message": "Database connection failed"}), 500
+    
     try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({"status": "error", "message": "Database connection failed"}), 500
-        
+        # COUNT(*) on the raw table is a full scan; the rollup holds the same
+        # total (including expired partitions) in a few rows per container-hour
         cursor = conn.cursor()
-        cursor.execute('SELECT COUNT(*) FROM visits')
-        count = cursor.fetchone()[0]
+        cursor.execute('SELECT COALESCE(SUM(visits), 0) FROM visits_hourly')
+        count = int(cursor.fetchone()[0])
         cursor.close()
-        conn.close()
         
         return jsonify({
             "status": "ok",
@@ -657,15 +2821,88 @@ def db_test():
             "total_visits_recorded": count
         })
     except Exception as e:
+        conn.invalidate()
         return jsonify({"status": "error", "message": str(e)}), 500
+    finally:
+        conn.close()
+
+@app.route('/admin/refresh-identity', methods=['POST'])
+def admin_refresh_identity():
+    """Re-resolve hostname/IP for the worker handling this request"""
+    if not admin_authorized():
+        return jsonify({"status": "error", "message": "Forbidden"}), 403
+    
+    identity = refresh_identity()
+    # The cached home page shows the old hostname/IP
+    home_page_cache.clear()
+    return jsonify({"status": "ok", "container_info": identity.as_dict()})
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics, aggregated across workers in multiprocess mode"""
+    if not METRICS_ENABLED:
+        return jsonify({"status": "error", "message": "prometheus_client is not installed"}), 503
+    
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return prometheus_client.generate_latest(registry), 200, {'Content-Type': prometheus_client.CONTENT_TYPE_LATEST}
+
+@app.route('/debug/slow')
+def debug_slow():
+    """Span trees of this worker's slowest recent traced requests (PROFILE_MODE)"""
+    if not PROFILING_ENABLED:
+        return jsonify({"status": "error", "message": "Request tracing is off (PROFILE_MODE)"}), 404
+    if not admin_authorized():
+        return jsonify({"status": "error", "message": "Forbidden"}), 403
+    
+    return jsonify({
+        "worker": os.getpid(),
+        "threshold_ms": PROFILING_CONFIG['slow_ms'],
+        "requests": list(reversed(slow_requests))
+    })
+
+# ============ CLI COMMANDS ============
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Create the database tables (once per deployment, before the app starts)"""
+    if not init_database(**DB_INIT_CONFIG):
+        raise click.ClickException("Database initialization failed")
+    click.echo("Database initialized")
+
+@app.cli.command('maintain-visits')
+@click.option('--retention-days', default=VISITS_TABLE_CONFIG['retention_days'], show_default=True,
+              help='Drop raw visits older than this many days')
+@click.option('--days-ahead', default=VISITS_TABLE_CONFIG['partitions_ahead'], show_default=True,
+              help='Create daily partitions this many days in advance')
+def maintain_visits_command(retention_days, days_ahead):
+    """Create upcoming visits partitions and drop expired ones (run daily)"""
+    result = maintain_visit_partitions(retention_days, days_ahead)
+    if result is None:
+        raise click.ClickException("Partition maintenance failed")
+    added, dropped = result
+    click.echo(f"Added partitions: {', '.join(added) or 'none'}; dropped: {', '.join(dropped) or 'none'}")
+
+@app.cli.command('reconcile-cache')
+@click.option('--batch-size', default=1000, show_default=True, help='Keys per SCAN batch')
+@click.option('--pause', default=0.0, show_default=True, help='Seconds to sleep between batches')
+def reconcile_cache_command(batch_size, pause):
+    """Rebuild the cached-requests index with an incremental SCAN"""
+    indexed, removed = reconcile_cached_requests(batch_size=batch_size, pause=pause)
+    click.echo(f"Indexed {indexed} request keys, removed {removed} stale entries")
 
 if __name__ == '__main__':
-    # Initialize database on startup
-    init_database()
+    # Tables are created beforehand by `flask --app app2 init-db`
     
     # Get configuration
     port = int(os.getenv('PORT', 5000))
     debug = os.getenv('FLASK_ENV') == 'development'
     
+    # `kill -HUP <pid>` re-resolves the container identity
+    signal.signal(signal.SIGHUP, refresh_identity)
+    
     # Run Flask app
     app.run(host='0.0.0.0', port=port, debug=debug)
@@ -0,0 +1,472 @@
+"""
+Async (ASGI) variant of app2.py.
+
+Serves the same routes and page, but talks to MySQL through aiomysql and to
+Redis through redis.asyncio, so a worker is never blocked on a round trip.
+Independent calls within a request run concurrently with asyncio.gather.
+
+Configuration, the page template and the Redis key layout are shared with
+app2.py. Run it with:
+
+    uvicorn app2_async:app --host 0.0.0.0 --port 5000 --workers 4
+"""
+from quart import Quart, jsonify, request
+from datetime import datetime
+import os
+import time
+import asyncio
+import logging
+import aiomysql
+import redis.asyncio as aioredis
+
+from app2 import (
+    DB_CONFIG,
+    DB_POOL_CONFIG,
+    HEALTH_CONFIG,
+    REDIS_CONFIG,
+    REDIS_POOL_CONFIG,
+    CACHED_REQUESTS_INDEX,
+    INCREMENT_COUNTER_SQL,
+    INCREMENT_HOURLY_SQL,
+    HTML_TEMPLATE,
+    STYLESHEET_URL,
+    counter_slot,
+    hourly_rollup_rows,
+    parse_visit_window,
+    visit_rollup_queries,
+    summarize_visit_rollups,
+    queue_visit_buckets,
+    visit_bucket_key,
+    parse_timeseries_request,
+    summarize_visit_timeseries,
+    get_identity,
+    orjson,
+    OrjsonProvider
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+app = Quart(__name__)
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 365 * 24 * 3600
+if orjson is not None:
+    app.json = OrjsonProvider(app)
+
+# Quart's Jinja environment is async, so the page renders with render_async()
+HOME_TEMPLATE = app.jinja_env.from_string(HTML_TEMPLATE)
+
+# Clients are created per worker process once the event loop is running
+db_pool = None
+redis_client = None
+
+# Outcome of the most recent Redis command in this worker (None = no command yet)
+redis_state = {'ok': None, 'last_success': None, 'last_error': None}
+
+# Latest background dependency check (see run_health_monitor); None until the first
+health_snapshot = None
+health_task = None
+
+@app.before_serving
+async def open_clients():
+    """Create the MySQL and Redis pools for this worker and start its health monitor"""
+    global db_pool, redis_client, health_task
+    try:
+        db_pool = await aiomysql.create_pool(
+            host=DB_CONFIG['host'],
+            port=DB_CONFIG['port'],
+            user=DB_CONFIG['user'],
+            password=DB_CONFIG['password'],
+            db=DB_CONFIG['database'],
+            minsize=0,
+            maxsize=DB_POOL_CONFIG['size'] + DB_POOL_CONFIG['max_overflow'],
+            pool_recycle=int(DB_POOL_CONFIG['pre_ping_after']),
+            # Reads must not leave a REPEATABLE READ snapshot open on a pooled
+            # connection; writes open their own transaction with begin()
+            autocommit=True
+        )
+    except Exception as e:
+        logger.error(f"Database pool creation error: {e}")
+    redis_client = aioredis.Redis(connection_pool=aioredis.ConnectionPool(**REDIS_CONFIG, **REDIS_POOL_CONFIG))
+    health_task = asyncio.create_task(run_health_monitor())
+
+@app.after_serving
+async def close_clients():
+    if health_task is not None:
+        health_task.cancel()
+    if db_pool is not None:
+        db_pool.close()
+        await db_pool.wait_closed()
+    if redis_client is not None:
+        await redis_client.aclose()
+
+# ============ DATABASE FUNCTIONS ============
+
+async def check_database():
+    """Ping the database over a pooled connection"""
+    if db_pool is None:
+        return False
+    try:
+        async with asyncio.timeout(DB_POOL_CONFIG['timeout']):
+            async with db_pool.acquire() as conn:
+                await conn.ping(reconnect=False)
+        return True
+    except Exception as e:
+        logger.error(f"Database ping failed: {e}")
+        return False
+
+async def record_visit(container_id, user_agent="", ip_address=""):
+    """Record a visit in the database"""
+    if db_pool is None:
+        return False
+    now = datetime.now()
+    try:
+        async with asyncio.timeout(DB_POOL_CONFIG['timeout']):
+            async with db_pool.acquire() as conn:
+                await conn.begin()
+                async with conn.cursor() as cursor:
+                    await cursor.execute(
+                        'INSERT INTO visits (container_id, user_agent, ip_address, timestamp) VALUES (%s, %s, %s, %s)',
+                        (container_id, user_agent, ip_address, now)
+                    )
+                    await cursor.execute(INCREMENT_COUNTER_SQL, (counter_slot(container_id), 1))
+                    await cursor.executemany(INCREMENT_HOURLY_SQL, hourly_rollup_rows([(container_id, now)]))
+                await conn.commit()
+        return True
+    except Exception as e:
+        logger.error(f"Error recording visit: {e}")
+        return False
+
+async def get_total_visits():
+    """Get total visits from database"""
+    if db_pool is None:
+        return 0
+    try:
+        async with asyncio.timeout(DB_POOL_CONFIG['timeout']):
+            async with db_pool.acquire() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute('SELECT COALESCE(SUM(total_count), 0) FROM visits_counter')
+                    result = await cursor.fetchone()
+        return int(result[0]) if result else 0
+    except Exception as e:
+        logger.error(f"Error getting total visits: {e}")
+        return 0
+
+async def query_visit_rollups(container_id, since, until):
+    """Visit statistics for a time window from the hourly rollup (None on error)"""
+    if db_pool is None:
+        return None
+    try:
+        results = []
+        async with asyncio.timeout(DB_POOL_CONFIG['timeout']):
+            async with db_pool.acquire() as conn:
+                async with conn.cursor() as cursor:
+                    for sql, params in visit_rollup_queries(container_id, since, until):
+                        await cursor.execute(sql, params)
+                        results.append(await cursor.fetchall())
+        return summarize_visit_rollups(container_id, since, until, *results)
+    except Exception as e:
+        logger.error(f"Error reading visit rollups: {e}")
+        return None
+
+# ============ REDIS CACHE FUNCTIONS ============
+
+async def redis_call(description, command, fallback):
+    """Await a Redis command, recording its outcome and returning `fallback` on error"""
+    try:
+        result = await command
+    except Exception as e:
+        redis_state['ok'] = False
+        redis_state['last_error'] = time.time()
+        logger.error(f"Error {description}: {e}")
+        return fallback
+    redis_state['ok'] = True
+    redis_state['last_success'] = time.time()
+    return result
+
+async def increment_page_views():
+    """Increment the page view counter and this container's time buckets (one round trip)"""
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.incr('page_views')
+    queue_visit_buckets(pipe, get_identity().container_id)
+    results = await redis_call("incrementing page views", pipe.execute(), None)
+    return results[0] if results else 0
+
+async def get_page_views():
+    """Get page view count from Redis"""
+    views = await redis_call("getting page views", redis_client.get('page_views'), None)
+    return int(views) if views else 0
+
+async def get_cached_requests_count():
+    """Get number of cached requests (O(log N) read of the index)"""
+    return await redis_call(
+        "getting cached requests",
+        redis_client.zcount(CACHED_REQUESTS_INDEX, time.time(), '+inf'),
+        0
+    )
+
+async def get_visit_timeseries(resolution, starts, container_id=None):
+    """Read every bucket of the window in one pipelined round trip (None on error)"""
+    pipe = redis_client.pipeline(transaction=False)
+    for start in starts:
+        key = visit_bucket_key(resolution, start)
+        if container_id:
+            pipe.hget(key, container_id)
+        else:
+            pipe.hgetall(key)
+    buckets = await redis_call("reading visit time series", pipe.execute(), None)
+    if buckets is None:
+        return None
+    return summarize_visit_timeseries(resolution, starts, container_id, buckets)
+
+async def check_redis():
+    """Explicitly PING Redis (used by the health monitor only)"""
+    return await redis_call("pinging Redis", redis_client.ping(), False)
+
+# ============ HEALTH MONITOR ============
+
+async def check_health_now():
+    """Probe both dependencies concurrently and store the result"""
+    global health_snapshot
+    db_ok, redis_ok = await asyncio.gather(check_database(), check_redis())
+    health_snapshot = {'database': db_ok, 'redis': redis_ok, 'checked_at': time.time()}
+    return health_snapshot
+
+async def run_health_monitor():
+    """Background task: re-check the dependencies every HEALTH_CHECK_INTERVAL seconds"""
+    while True:
+        try:
+            await check_health_now()
+        except Exception as e:
+            logger.error(f"Health check failed: {e}")
+        await asyncio.sleep(HEALTH_CONFIG['interval'])
+
+async def get_health_snapshot():
+    """
+    Latest result, with its age in seconds and a staleness flag, as
+    app2's HealthMonitor.snapshot(). Probes cost no connections; only a
+    read before the first background check runs one itself.
+    """
+    snapshot = health_snapshot or await check_health_now()
+    age = time.time() - snapshot['checked_at']
+    return dict(snapshot, age=age, stale=age > HEALTH_CONFIG['max_staleness'])
+
+# ============ ROUTES ============
+
+@app.route('/')
+async def home():
+    """
+    Main route that displays welcome message with container and service information
+    """
+    identity = get_identity()
+    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    loaded_time = datetime.now().strftime("%H:%M:%S")
+
+    # All dependency calls are independent, so they run concurrently
+    db_ok, total_visits, page_views, cached_requests, _ = await asyncio.gather(
+        check_database(),
+        get_total_visits(),
+        increment_page_views(),
+        get_cached_requests_count(),
+        record_visit(identity.container_id)
+    )
+    redis_ok = redis_state['ok']
+
+    return await HOME_TEMPLATE.render_async(
+        stylesheet_url=STYLESHEET_URL,
+        hostname=identity.hostname,
+        container_ip=identity.container_ip,
+        python_version=identity.python_version,
+        current_time=current_time,
+        environment=identity.environment,
+        container_id=identity.container_id,
+        loaded_time=loaded_time,
+        db_status="Connected ✓" if db_ok else "Disconnected ✗",
+        db_status_class="status-ok" if db_ok else "status-error",
+        db_host=DB_CONFIG['host'],
+        db_name=DB_CONFIG['database'],
+        total_visits=total_visits,
+        redis_status="Connected ✓" if redis_ok else "Disconnected ✗",
+        redis_status_class="status-ok" if redis_ok else "status-error",
+        redis_host=REDIS_CONFIG['host'],
+        page_views=page_views,
+        cached_requests=cached_requests
+    )
+
+@app.route('/health')
+async def health():
+    """
+    Health check endpoint for container monitoring
+    Reports the cached state of all three services (see run_health_monitor)
+    """
+    snapshot = await get_health_snapshot()
+    db_ok = snapshot['database']
+    redis_ok = snapshot['redis']
+
+    if snapshot['stale']:
+        status = "stale"
+    else:
+        status = "healthy" if (db_ok and redis_ok) else "degraded"
+
+    return jsonify({
+        "status": status,
+        "timestamp": datetime.now().isoformat(),
+        "checked_at": datetime.fromtimestamp(snapshot['checked_at']).isoformat(),
+        "age_seconds": round(snapshot['age'], 3),
+        "service": "flask-docker-demo",
+        "version": "2.0.0",
+        "services": {
+            "database": "ok" if db_ok else "failed",
+            "redis": "ok" if redis_ok else "failed"
+        }
+    })
+
+@app.route('/health/live')
+async def health_live():
+    """
+    Liveness probe: the worker process is up and serving requests
+    """
+    return jsonify({"status": "alive", "timestamp": datetime.now().isoformat()})
+
+@app.route('/health/ready')
+async def health_ready():
+    """
+    Readiness probe: 200 only when both dependencies were reachable at the
+    last background check and that check is recent enough
+    """
+    snapshot = await get_health_snapshot()
+    ready = snapshot['database'] and snapshot['redis'] and not snapshot['stale']
+
+    return jsonify({
+        "status": "ready" if ready else "not ready",
+        "age_seconds": round(snapshot['age'], 3),
+        "services": {
+            "database": "ok" if snapshot['database'] else "failed",
+            "redis": "ok" if snapshot['redis'] else "failed"
+        }
+    }), 200 if ready else 503
+
+@app.route('/info')
+async def info():
+    """
+    Information endpoint that returns container and service details in JSON format
+    """
+    identity = get_identity()
+
+    db_ok, total_visits, page_views = await asyncio.gather(
+        check_database(),
+        get_total_visits(),
+        get_page_views()
+    )
+
+    return jsonify({
+        "message": "Multi-container Docker application demo",
+        "application": {
+            "name": "Docker Class Demo",
+            "version": "2.0.0",
+            "environment": identity.environment,
+            "server": "asgi"
+        },
+        "container_info": {
+            "hostname": identity.hostname,
+            "container_id": identity.container_id,
+            "ip_address": identity.container_ip,
+            "python_version": identity.python_version,
+            "timestamp": datetime.now().isoformat()
+        },
+        "services": {
+            "database": {
+                "host": DB_CONFIG['host'],
+                "name": DB_CONFIG['database'],
+                "status": "connected" if db_ok else "disconnected",
+                "total_visits": total_visits
+            },
+            "cache": {
+                "host": REDIS_CONFIG['host'],
+                "port": REDIS_CONFIG['port'],
+                "status": "connected" if redis_state['ok'] else "disconnected",
+                "page_views": page_views
+            }
+        }
+    })
+
+@app.route('/api/visits')
+async def get_visits():
+    """Get visit statistics from database (window parameters as in app2.py)"""
+    try:
+        window = parse_visit_window(request.args)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid query parameter: {e}"}), 400
+
+    calls = [get_total_visits(), get_page_views()]
+    if window:
+        calls.append(query_visit_rollups(*window))
+    total, page_views, *stats = await asyncio.gather(*calls)
+
+    response = {
+        "total_visits_in_db": total,
+        "page_views_from_cache": page_views,
+        "timestamp": datetime.now().isoformat()
+    }
+    if window:
+        if stats[0] is None:
+            return jsonify({"error": "Visit statistics are unavailable"}), 503
+        response["window"] = stats[0]
+    return jsonify(response)
+
+@app.route('/api/visits/timeseries')
+async def get_visits_timeseries():
+    """Visits per minute or hour from the Redis time buckets (parameters as in app2.py)"""
+    try:
+        resolution, starts, container_id = parse_timeseries_request(request.args)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid query parameter: {e}"}), 400
+
+    series = await get_visit_timeseries(resolution, starts, container_id)
+    if series is None:
+        return jsonify({"error": "Visit statistics are unavailable"}), 503
+    return jsonify(series)
+
+@app.route('/api/redis-test')
+async def redis_test():
+    """Test Redis connectivity and basic operations"""
+    try:
+        # SET, GET and DBSIZE in a single round trip
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.set('test_key', 'test_value')
+            pipe.get('test_key')
+            pipe.dbsize()
+            _, value, key_count = await pipe.execute()
+
+        return jsonify({
+            "status": "ok",
+            "message": "Redis is working",
+            "test_key_value": value,
+            "all_keys_count": key_count
+        })
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@app.route('/api/db-test')
+async def db_test():
+    """Test database connectivity"""
+    if db_pool is None:
+        return jsonify({"status": "error", "message": "Database connection failed"}), 500
+
+    try:
+        async with asyncio.timeout(DB_POOL_CONFIG['timeout']):
+            async with db_pool.acquire() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute('SELECT COALESCE(SUM(visits), 0) FROM visits_hourly')
+                    count = int((await cursor.fetchone())[0])
+
+        return jsonify({
+            "status": "ok",
+            "message": "Database is working",
+            "total_visits_recorded": count
+        })
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+if __name__ == '__main__':
+    port = int(os.getenv('PORT', 5000))
+    app.run(host='0.0.0.0', port=port)
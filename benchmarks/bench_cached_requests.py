@@ -0,0 +1,76 @@
+"""
+Benchmark: counting cached requests with KEYS vs the sorted-set index.
+
+Fills a scratch Redis database with N request:* keys (plus the same amount
+of unrelated keys) and times both ways of counting them:
+
+    before: len(r.keys('request:*'))                  O(N) over the keyspace
+    after:  r.zcount('requests:index', now, '+inf')   O(log N)
+
+Needs a running redis-server. It FLUSHES the selected database, so point it
+at a scratch db number.
+
+    python benchmarks/bench_cached_requests.py --sizes 100000 1000000 --db 15
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import redis
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app2 import CACHED_REQUESTS_INDEX  # noqa: E402
+
+
+def populate(r, size, chunk=10000):
+    """Write `size` request:* keys, their index entries and `size` other keys"""
+    r.flushdb()
+    for start in range(0, size, chunk):
+        pipe = r.pipeline(transaction=False)
+        mapping = {}
+        for i in range(start, min(start + chunk, size)):
+            pipe.set(f'request:{i}', 'x')
+            pipe.set(f'other:{i}', 'x')
+            mapping[f'request:{i}'] = '+inf'
+        pipe.zadd(CACHED_REQUESTS_INDEX, mapping)
+        pipe.execute()
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "max_ms": round(max(samples), 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default=os.getenv('REDIS_HOST', 'localhost'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('REDIS_PORT', 6379)))
+    parser.add_argument('--db', type=int, default=15, help='scratch database, flushed by the benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    r = redis.Redis(host=args.host, port=args.port, db=args.db, decode_responses=True)
+    results = []
+    for size in args.sizes:
+        populate(r, size)
+        before = timed(lambda: len(r.keys('request:*')), args.repeat)
+        after = timed(lambda: r.zcount(CACHED_REQUESTS_INDEX, time.time(), '+inf'), args.repeat)
+        results.append({"request_keys": size, "total_keys": r.dbsize(), "keys_scan": before, "index_zcount": after})
+    r.flushdb()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Cold start: time from launching the server to its first 200 response.
+
+Either start the app locally under the same servers as benchmarks/run.py,
+or time `docker run` of a built image end to end:
+
+    python benchmarks/bench_cold_start.py --app app2 --server gunicorn --runs 5
+    python benchmarks/bench_cold_start.py --docker docker-container-demo \\
+        --docker-arg=-e --docker-arg=APP_MODULE=app2:app --runs 5
+
+The schema is not created here; run `flask --app app2 init-db` against a
+real database first if the comparison should include MySQL.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from run import free_port, start_server, stop_server  # noqa: E402
+
+
+def wait_for_200(url, timeout):
+    """Seconds until `url` answers 200, or None after `timeout`"""
+    started = time.monotonic()
+    while time.monotonic() - started < timeout:
+        try:
+            with urllib.request.urlopen(url, timeout=2) as response:
+                if response.status == 200:
+                    return time.monotonic() - started
+        except (urllib.error.HTTPError, OSError):
+            pass
+        time.sleep(0.02)
+    return None
+
+
+def local_run(args):
+    port = free_port()
+    started = time.monotonic()
+    process = start_server(args.app, args.server, args.workers, port, {})
+    try:
+        if wait_for_200(f'http://127.0.0.1:{port}{args.path}', args.timeout) is None:
+            return None
+        return time.monotonic() - started
+    finally:
+        stop_server(process)
+
+
+def docker_run(args):
+    port = free_port()
+    started = time.monotonic()
+    container = subprocess.check_output(
+        ['docker', 'run', '-d', '--rm', '-p', f'127.0.0.1:{port}:5000', *args.docker_arg, args.docker],
+        text=True
+    ).strip()
+    try:
+        if wait_for_200(f'http://127.0.0.1:{port}{args.path}', args.timeout) is None:
+            return None
+        return time.monotonic() - started
+    finally:
+        subprocess.run(['docker', 'rm', '-f', container], capture_output=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--app', choices=['app', 'app2', 'app2_async'], default='app2')
+    parser.add_argument('--server', choices=['gunicorn', 'dev', 'uvicorn'], default='gunicorn')
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--docker', metavar='IMAGE', help='time `docker run IMAGE` instead of a local server')
+    parser.add_argument('--docker-arg', action='append', default=[], help='extra `docker run` argument (repeatable)')
+    parser.add_argument('--path', default='/')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--timeout', type=float, default=120.0)
+    args = parser.parse_args()
+
+    launch = docker_run if args.docker else local_run
+    timings = []
+    for run in range(args.runs):
+        elapsed = launch(args)
+        print(f"run {run + 1}: " + (f"{elapsed:.2f}s" if elapsed is not None else "no 200 before timeout"),
+              file=sys.stderr)
+        if elapsed is not None:
+            timings.append(elapsed)
+
+    print(json.dumps({
+        "target": args.docker or f"{args.app} under {args.server}",
+        "path": args.path,
+        "runs": args.runs,
+        "failed": args.runs - len(timings),
+        "min_s": round(min(timings), 3) if timings else None,
+        "median_s": round(statistics.median(timings), 3) if timings else None,
+        "max_s": round(max(timings), 3) if timings else None
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
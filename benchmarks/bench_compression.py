@@ -0,0 +1,87 @@
+"""
+Benchmark: CPU cost of response compression against bytes saved.
+
+Captures real app2 payloads through Flask's test client (sent without
+Accept-Encoding, so they come back uncompressed) and times compressing
+each one with gzip and, if installed, brotli at several levels:
+
+    python benchmarks/bench_compression.py --fake
+    python benchmarks/bench_compression.py --fake --gzip-levels 1 6 9 --brotli-qualities 1 4 11
+
+Levels used per request are COMPRESS_GZIP_LEVEL / COMPRESS_BROTLI_QUALITY;
+static files and the cached page use the highest level once. Redis is
+REDIS_HOST/REDIS_PORT, or --fake for an in-process fakeredis.
+"""
+import argparse
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import app2  # noqa: E402
+
+ROUTES = ['/api/visits', '/info', '/', '/api/visits/timeseries?window=6h']
+
+
+def capture_payloads(client):
+    payloads = {}
+    for route in ROUTES:
+        payloads[route] = client.get(route).get_data()
+    with open(os.path.join(app2.app.static_folder, 'app2.css'), 'rb') as f:
+        payloads['app2.css'] = f.read()
+    return payloads
+
+
+def timed_us(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1e6)
+    return round(statistics.median(samples), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--gzip-levels', type=int, nargs='+', default=[1, 6, 9])
+    parser.add_argument('--brotli-qualities', type=int, nargs='+', default=[1, 4, 11])
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--fake', action='store_true', help='use an in-process fakeredis')
+    args = parser.parse_args()
+
+    if args.fake:
+        import fakeredis
+        app2.REDIS_POOL_CONFIG.update(connection_class=fakeredis.FakeConnection, server=fakeredis.FakeServer())
+    payloads = capture_payloads(app2.app.test_client())
+
+    encoders = [(f'gzip-{level}', lambda data, level=level: gzip.compress(data, compresslevel=level, mtime=0))
+                for level in args.gzip_levels]
+    if app2.brotli:
+        encoders += [(f'br-{quality}', lambda data, quality=quality: app2.brotli.compress(data, quality=quality))
+                     for quality in args.brotli_qualities]
+    else:
+        print("Brotli is not installed; gzip only", file=sys.stderr)
+
+    results = []
+    for name, data in payloads.items():
+        row = {"payload": name, "bytes": len(data), "encodings": {}}
+        for encoder, encode in encoders:
+            encoded = encode(data)
+            row["encodings"][encoder] = {
+                "bytes": len(encoded),
+                "saved_pct": round(100 * (1 - len(encoded) / len(data)), 1) if data else 0.0,
+                "cpu_us": timed_us(lambda: encode(data), args.repeat)
+            }
+        results.append(row)
+        print(f"{name:<36} {len(data):>7} B  " + "  ".join(
+            f"{encoder} {stats['bytes']}B/{stats['cpu_us']}us" for encoder, stats in row["encodings"].items()),
+            file=sys.stderr)
+
+    print(json.dumps({"min_size": app2.COMPRESSION_CONFIG['min_size'], "results": results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark: visit counter write throughput vs number of counter slots.
+
+Spawns `--workers` processes that each open their own MySQL connection and
+hammer increment_visit_counter() (one autocommitted upsert per visit, the
+same statement record_visit() issues) for `--duration` seconds. Repeats for
+every slot count and reports increments per second.
+
+Runs against the database named by DB_NAME/--database, creating the tables
+with init_database() first. Use a scratch database: the counter is reset.
+
+    DB_HOST=127.0.0.1 DB_NAME=bench python benchmarks/bench_counter_slots.py --slots 1 4 16 64 --workers 32
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import app2  # noqa: E402
+
+
+def hammer(args):
+    slots, duration, worker_id = args
+    app2.VISITS_COUNTER_SLOTS = slots
+    conn = app2.mysql_connector.connect(**app2.DB_CONFIG, autocommit=True)
+    cursor = conn.cursor()
+    done = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        app2.increment_visit_counter(cursor, f'bench-{worker_id}')
+        done += 1
+    cursor.close()
+    conn.close()
+    return done
+
+
+def reset_counter(slots):
+    app2.VISITS_COUNTER_SLOTS = slots
+    conn = app2.mysql_connector.connect(**app2.DB_CONFIG)
+    cursor = conn.cursor()
+    cursor.execute('DELETE FROM visits_counter')
+    conn.commit()
+    cursor.close()
+    conn.close()
+    app2.init_database()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database', default=os.getenv('DB_NAME', 'docker_class_bench'))
+    parser.add_argument('--slots', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument('--workers', type=int, default=32, help='concurrent writer processes')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per slot count')
+    args = parser.parse_args()
+
+    app2.DB_CONFIG['database'] = args.database
+    results = []
+    for slots in args.slots:
+        reset_counter(slots)
+        with multiprocessing.Pool(args.workers) as pool:
+            counts = pool.map(hammer, [(slots, args.duration, i) for i in range(args.workers)])
+        total = sum(counts)
+        results.append({
+            "slots": slots,
+            "workers": args.workers,
+            "increments": total,
+            "increments_per_sec": round(total / args.duration, 1),
+            "counter_sum": app2.query_total_visits()
+        })
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
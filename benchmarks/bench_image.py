@@ -0,0 +1,150 @@
+"""
+Benchmark: image size, pull time and cold start of the old and new builds.
+
+Builds the single-stage Dockerfile from --old-ref (by default the commit
+before the Dockerfile became multi-stage) from a `git archive` of that
+revision, and each --targets stage of the current Dockerfile from the
+working tree. For every image it reports:
+
+    size_mb       uncompressed size (`docker image inspect`)
+    layers_mb     gzip-compressed `docker save` output: roughly what a pull downloads
+    pull_s        median cold `docker pull` time from --registry (no layers cached locally)
+    cold_start_s  median seconds from `docker run` to the first 200 (bench_cold_start.py)
+
+    python benchmarks/bench_image.py --runs 5
+    docker run -d -p 5005:5000 --name registry registry:2
+    python benchmarks/bench_image.py --registry localhost:5005 --runs 5
+
+Without --registry pull_s is left out. The containers get no MySQL/Redis,
+so app2 is timed against /health/live.
+"""
+import argparse
+import gzip
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from run import REPO_ROOT  # noqa: E402
+from bench_cold_start import docker_run  # noqa: E402
+
+# The route timed for cold start, per APP_MODULE
+READY_PATHS = {'app:app': '/health', 'app2:app': '/health/live'}
+
+
+def default_old_ref():
+    """Parent of the commit that introduced the builder stage, else HEAD"""
+    introduced = subprocess.run(
+        ['git', 'log', '--format=%H', '-S', 'AS builder', '--', 'Dockerfile'],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    ).stdout.split()
+    return f'{introduced[-1]}~1' if introduced else 'HEAD'
+
+
+def build_old(ref, tag):
+    archive = subprocess.Popen(['git', 'archive', ref], cwd=REPO_ROOT, stdout=subprocess.PIPE)
+    started = time.monotonic()
+    subprocess.run(['docker', 'build', '-q', '-t', tag, '-'], stdin=archive.stdout, check=True,
+                   stdout=subprocess.DEVNULL)
+    archive.wait()
+    return time.monotonic() - started
+
+
+def build_target(target, tag):
+    started = time.monotonic()
+    subprocess.run(['docker', 'build', '-q', '--target', target, '-t', tag, '.'], cwd=REPO_ROOT, check=True,
+                   stdout=subprocess.DEVNULL, env=dict(os.environ, DOCKER_BUILDKIT='1'))
+    return time.monotonic() - started
+
+
+def image_size_mb(tag):
+    size = subprocess.check_output(['docker', 'image', 'inspect', '--format', '{{.Size}}', tag], text=True)
+    return round(int(size) / 1e6, 1)
+
+
+def compressed_size_mb(tag):
+    """Bytes of `docker save` after gzip -6, streamed"""
+    save = subprocess.Popen(['docker', 'save', tag], stdout=subprocess.PIPE)
+    compressor = gzip.compressobj(6)
+    total = 0
+    for chunk in iter(lambda: save.stdout.read(1 << 20), b''):
+        total += len(compressor.compress(chunk))
+    total += len(compressor.flush())
+    save.wait()
+    return round(total / 1e6, 1)
+
+
+def push(tag, registry):
+    remote = f'{registry}/{tag.replace(":", "-")}:bench'
+    subprocess.run(['docker', 'tag', tag, remote], check=True)
+    subprocess.run(['docker', 'push', '-q', remote], check=True, stdout=subprocess.DEVNULL)
+    return remote
+
+
+def pull_time(remote, local_tags, runs):
+    """
+    Median seconds to pull `remote` with none of its layers present.
+
+    Every image sharing layers with it (all the benchmark tags and the
+    python:3.11-slim base) is removed first, so each pull is a cold one.
+    """
+    samples = []
+    for _ in range(runs):
+        subprocess.run(['docker', 'rmi', '-f', *local_tags, 'python:3.11-slim'], capture_output=True)
+        started = time.monotonic()
+        subprocess.run(['docker', 'pull', '-q', remote], check=True, stdout=subprocess.DEVNULL)
+        samples.append(time.monotonic() - started)
+    return round(statistics.median(samples), 2)
+
+
+def cold_start(tag, app_module, runs, timeout):
+    args = argparse.Namespace(
+        docker=tag, docker_arg=['-e', f'APP_MODULE={app_module}'],
+        path=READY_PATHS[app_module], timeout=timeout
+    )
+    samples = [docker_run(args) for _ in range(runs)]
+    if None in samples:
+        return None
+    return round(statistics.median(samples), 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--old-ref', help='git revision whose Dockerfile is the old build')
+    parser.add_argument('--targets', nargs='+', default=['app', 'app2', 'app2-speed'])
+    parser.add_argument('--tag', default='docker-container-demo')
+    parser.add_argument('--registry', help='registry (host:port) to push to and time pulls from')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--timeout', type=float, default=120.0)
+    args = parser.parse_args()
+
+    old_ref = args.old_ref or default_old_ref()
+    images = [("old", f'{args.tag}:old', ['app:app', 'app2:app'], lambda tag: build_old(old_ref, tag))]
+    for target in args.targets:
+        modules = ['app:app'] if target == 'app' else ['app2:app']
+        images.append((target, f'{args.tag}:{target}', modules, lambda tag, target=target: build_target(target, tag)))
+
+    results = []
+    for name, tag, modules, build in images:
+        row = {"image": name, "tag": tag, "build_s": round(build(tag), 1),
+               "size_mb": image_size_mb(tag), "layers_mb": compressed_size_mb(tag),
+               "cold_start_s": {module: cold_start(tag, module, args.runs, args.timeout) for module in modules}}
+        results.append(row)
+        print(f"{name:>11} {row['size_mb']:>7} MB  {row['layers_mb']:>7} MB gz  "
+              f"cold start {row['cold_start_s']}", file=sys.stderr)
+
+    # Last, as cold pulls delete the local images
+    if args.registry:
+        remotes = [push(row["tag"], args.registry) for row in results]
+        for row, remote in zip(results, remotes):
+            row["pull_s"] = pull_time(remote, [r["tag"] for r in results] + remotes, args.runs)
+            print(f"{row['image']:>11} pull {row['pull_s']}s", file=sys.stderr)
+
+    print(json.dumps({"old_ref": old_ref, "results": results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark: what logging costs the request thread during a dependency outage.
+
+Times one failing-dependency log call the old way (logging.basicConfig:
+format and write in the calling thread) and through app2's queue handler,
+with and without the per-dependency dedup, then the per-request cost of
+the JSON access log at several sample rates. All output goes to
+/dev/null; "lines" is how many records would have reached stdout.
+--sink-delay-ms makes every write that slow, like a stdout pipe the log
+collector is not draining fast enough.
+
+    python benchmarks/bench_logging.py --calls 20000
+    python benchmarks/bench_logging.py --calls 2000 --sink-delay-ms 1
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import app2  # noqa: E402
+
+
+class CountingStream:
+    """File-like sink that counts lines, optionally slow to write"""
+
+    def __init__(self, delay=0.0):
+        self.lines = 0
+        self.delay = delay
+        self.devnull = open(os.devnull, 'w')
+
+    def write(self, text):
+        self.lines += text.count('\n')
+        if self.delay:
+            time.sleep(self.delay)
+        self.devnull.write(text)
+
+    def flush(self):
+        pass
+
+
+def per_call_us(fn, calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return round((time.perf_counter() - started) / calls * 1e6, 2)
+
+
+def bench_errors(calls, delay):
+    error = app2.redis.ConnectionError("Error 111 connecting to redis:6379. Connection refused.")
+    results = {}
+
+    sink = CountingStream(delay)
+    handler = logging.StreamHandler(sink)
+    handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    old = logging.getLogger('bench.basicconfig')
+    old.addHandler(handler)
+    old.propagate = False
+    results["basicconfig"] = {"us_per_call": per_call_us(lambda: old.error(f"Error caching request: {error}"), calls),
+                              "lines": sink.lines}
+
+    for name, interval in (("queue", 0), ("queue_dedup", 10.0)):
+        sink = CountingStream(delay)
+        app2.log_writer.handlers[0].setStream(sink)
+        app2.error_log_limiter = app2.ErrorLogLimiter(interval)
+        us = per_call_us(lambda: app2.dependency_error('redis', "Error caching request", error), calls)
+        app2.stop_log_writer()
+        results[name] = {"us_per_call": us, "lines": sink.lines}
+        app2._restart_log_writer()
+    return results
+
+
+def bench_access_log(requests, rates):
+    app2.log_writer.handlers[0].setStream(CountingStream())
+    client = app2.app.test_client()
+    results = {}
+    for rate in rates:
+        app2.LOG_CONFIG['access_sample_rate'] = rate
+        samples = []
+        for _ in range(5):
+            samples.append(per_call_us(lambda: client.get('/health/live'), requests // 5))
+        results[str(rate)] = {"us_per_request": statistics.median(samples)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=20000, help='failing-dependency log calls per mode')
+    parser.add_argument('--requests', type=int, default=5000, help='requests per access-log sample rate')
+    parser.add_argument('--rates', type=float, nargs='+', default=[0.0, 0.01, 1.0])
+    parser.add_argument('--sink-delay-ms', type=float, default=0.0, help='time each log write takes')
+    args = parser.parse_args()
+
+    results = {
+        "dependency_errors": bench_errors(args.calls, args.sink_delay_ms / 1000),
+        "access_log": bench_access_log(args.requests, args.rates)
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark: bytes and CPU per `/` request with and without the page cache.
+
+Drives the home page through Flask's test client in three modes:
+
+    render:      PAGE_CACHE_TTL=0, every request renders the page
+    cached:      PAGE_CACHE_TTL set, a plain GET gets the cached body
+    conditional: PAGE_CACHE_TTL set, the client sends If-None-Match (304)
+
+CPU is process time (all threads, so app2's fan-out is included) divided
+by the number of requests. app2 needs Redis at REDIS_HOST/REDIS_PORT, or
+--fake for an in-process fakeredis, whose command handling then counts
+as app CPU too. MySQL may be down; it only shows up as a disconnected
+badge.
+
+    python benchmarks/bench_page_cache.py --app app2 --fake --requests 2000
+"""
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def set_ttl(module, ttl):
+    if hasattr(module, 'PAGE_CACHE_CONFIG'):
+        module.PAGE_CACHE_CONFIG['ttl'] = module.home_page_cache.ttl = ttl
+        module.home_page_cache.clear()
+    else:
+        module.PAGE_CACHE_TTL = ttl
+        module._page = None
+
+
+def measure(client, requests, headers=None):
+    client.get('/', headers=headers)
+    body_bytes, statuses = 0, set()
+    cpu_started, wall_started = time.process_time(), time.perf_counter()
+    for _ in range(requests):
+        response = client.get('/', headers=headers)
+        body_bytes += len(response.data)
+        statuses.add(response.status_code)
+    cpu, wall = time.process_time() - cpu_started, time.perf_counter() - wall_started
+    return {
+        "status": sorted(statuses),
+        "bytes_per_request": round(body_bytes / requests),
+        "cpu_us_per_request": round(cpu / requests * 1e6, 1),
+        "wall_us_per_request": round(wall / requests * 1e6, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--app', choices=['app', 'app2'], default='app2')
+    parser.add_argument('--ttl', type=float, default=1.0, help='PAGE_CACHE_TTL for the cached modes')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--fake', action='store_true', help='use an in-process fakeredis (app2)')
+    args = parser.parse_args()
+
+    module = importlib.import_module(args.app)
+    if args.fake and args.app == 'app2':
+        import fakeredis
+        module.REDIS_POOL_CONFIG.update(connection_class=fakeredis.FakeConnection, server=fakeredis.FakeServer())
+    client = module.app.test_client()
+
+    results = {}
+    set_ttl(module, 0)
+    results["render"] = measure(client, args.requests)
+    # A long-lived entry keeps every measured request a hit
+    set_ttl(module, 3600)
+    results["cached"] = measure(client, args.requests)
+    etag = client.get('/').headers['ETag']
+    results["conditional"] = measure(client, args.requests, headers={'If-None-Match': etag})
+
+    for mode, row in results.items():
+        print(f"{mode:>11} {row['bytes_per_request']:>6} B  {row['cpu_us_per_request']:>8} us cpu", file=sys.stderr)
+    print(json.dumps({"app": args.app, "requests": args.requests, "results": results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark: per-request overhead of app2's request tracing (PROFILE_MODE).
+
+PROFILE_MODE is read at import, so each mode is measured in a fresh
+interpreter driving `/` through Flask's test client:
+
+    off      nothing wrapped or registered (the default)
+    header   hooks installed, but the request sends no X-Profile header
+    all      every request traced into a span tree
+    cprofile PROFILE_CPROFILE_EVERY=1, every request also under cProfile
+
+    python benchmarks/bench_profiling.py --requests 2000
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = {
+    'off': {'PROFILE_MODE': 'off'},
+    'header': {'PROFILE_MODE': 'header'},
+    'all': {'PROFILE_MODE': 'all'},
+    'cprofile': {'PROFILE_MODE': 'off', 'PROFILE_CPROFILE_EVERY': '1'}
+}
+
+
+def measure(requests, route):
+    """Runs in the child: median microseconds per request over 5 rounds"""
+    sys.path.insert(0, ROOT)
+    import fakeredis
+    import app2
+    app2.REDIS_POOL_CONFIG.update(connection_class=fakeredis.FakeConnection, server=fakeredis.FakeServer())
+    client = app2.app.test_client()
+    for _ in range(50):
+        client.get(route)
+    rounds = []
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(requests // 5):
+            client.get(route)
+        rounds.append((time.perf_counter() - started) / (requests // 5) * 1e6)
+    return round(statistics.median(rounds), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--route', default='/')
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(measure(args.requests, args.route))
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory() as profile_dir:
+        for mode in args.modes:
+            env = dict(os.environ, LOG_LEVEL='CRITICAL', PROFILE_CPROFILE_DIR=profile_dir, **MODES[mode])
+            output = subprocess.run(
+                [sys.executable, __file__, '--child', '--requests', str(args.requests), '--route', args.route],
+                env=env, capture_output=True, text=True, check=True
+            ).stdout
+            results[mode] = {"us_per_request": float(output.strip().splitlines()[-1])}
+            print(f"{mode:>9} {results[mode]['us_per_request']:>9} us/request", file=sys.stderr)
+
+    baseline = results.get('off', {}).get('us_per_request')
+    if baseline:
+        for row in results.values():
+            row["overhead_pct"] = round(100 * (row["us_per_request"] / baseline - 1), 1)
+    print(json.dumps({"route": args.route, "requests": args.requests, "results": results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark: import time and per-worker memory at startup.
+
+1. `python -X importtime -c "import <app>"`, repeated: total import time
+   of the app module and its slowest direct imports.
+2. gunicorn with --workers N, preload on and off: seconds to the first 200
+   from /health/live, then RSS, PSS and USS (private memory) of the master
+   and each worker from /proc/<pid>/smaps_rollup. With preload, modules
+   the master imported are shared with the workers, which shows in PSS/USS
+   rather than RSS.
+
+    python benchmarks/bench_startup.py --app app2 --workers 4
+
+MySQL/Redis need not be running; workers then start with those
+dependencies marked down.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from run import REPO_ROOT, free_port, start_server, stop_server  # noqa: E402
+from bench_cold_start import wait_for_200  # noqa: E402
+
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def import_times(app, runs, top):
+    totals, children = [], {}
+    for _ in range(runs):
+        stderr = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {app}'],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stderr
+        for self_us, cumulative_us, indent, module in IMPORTTIME_LINE.findall(stderr):
+            if module == app:
+                totals.append(int(cumulative_us))
+            elif len(indent) == 3:
+                # Imported directly by the app module
+                children.setdefault(module, []).append(int(cumulative_us))
+    slowest = sorted(((statistics.median(us), module) for module, us in children.items()), reverse=True)[:top]
+    return {
+        "total_ms": round(statistics.median(totals) / 1000, 1),
+        "slowest_direct_imports_ms": {module: round(us / 1000, 1) for us, module in slowest}
+    }
+
+
+def memory_kb(pid):
+    """RSS, PSS and USS of one process in kB"""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return {
+        "rss_kb": fields.get('Rss', 0),
+        "pss_kb": fields.get('Pss', 0),
+        "uss_kb": fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    }
+
+
+def child_pids(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(child) for child in f.read().split()]
+
+
+def gunicorn_startup(app, workers, preload, settle):
+    port = free_port()
+    started = time.monotonic()
+    process = start_server(app, 'gunicorn', workers, port, {'GUNICORN_PRELOAD': '1' if preload else '0'})
+    try:
+        ready = wait_for_200(f'http://127.0.0.1:{port}/health/live', 120)
+        elapsed = time.monotonic() - started if ready is not None else None
+        # Let every worker finish init_worker() before measuring
+        time.sleep(settle)
+        worker_memory = [memory_kb(pid) for pid in child_pids(process.pid)]
+        return {
+            "preload": preload,
+            "first_200_s": round(elapsed, 3) if elapsed is not None else None,
+            "master": memory_kb(process.pid),
+            "workers": len(worker_memory),
+            "worker_median": {key: statistics.median(m[key] for m in worker_memory) for key in worker_memory[0]}
+            if worker_memory else None,
+            "total_pss_kb": memory_kb(process.pid)["pss_kb"] + sum(m["pss_kb"] for m in worker_memory)
+        }
+    finally:
+        stop_server(process)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--app', choices=['app', 'app2'], default='app2')
+    parser.add_argument('--runs', type=int, default=5, help='importtime repetitions')
+    parser.add_argument('--top', type=int, default=8, help='slowest direct imports to list')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--settle', type=float, default=3.0, help='seconds to wait after the first 200')
+    parser.add_argument('--skip-gunicorn', action='store_true')
+    args = parser.parse_args()
+
+    results = {"app": args.app, "importtime": import_times(args.app, args.runs, args.top)}
+    print(f"import {args.app}: {results['importtime']['total_ms']} ms", file=sys.stderr)
+    if not args.skip_gunicorn:
+        results["gunicorn"] = []
+        for preload in (True, False):
+            row = gunicorn_startup(args.app, args.workers, preload, args.settle)
+            results["gunicorn"].append(row)
+            print(f"preload {'on ' if preload else 'off'}: first 200 after {row['first_200_s']}s, "
+                  f"total PSS {row['total_pss_kb']} kB", file=sys.stderr)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+Load-test comparison of the sync (gunicorn + Flask) and async (uvicorn +
+Quart) app2 servers.
+
+Start both against the same MySQL and Redis, e.g. with the container image:
+
+    docker run -d -p 5001:5000 -e APP_SERVER=sync -e APP_MODULE=app2:app ... <image>
+    docker run -d -p 5002:5000 -e APP_SERVER=async ... <image>
+
+then drive every route on both at each concurrency level:
+
+    python benchmarks/bench_sync_vs_async.py --sync http://localhost:5001 --async http://localhost:5002
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from loadgen import run_load  # noqa: E402
+
+ROUTES = ['/', '/health', '/info', '/api/visits', '/api/redis-test', '/api/db-test']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sync', dest='sync_url', default='http://localhost:5001')
+    parser.add_argument('--async', dest='async_url', default='http://localhost:5002')
+    parser.add_argument('--routes', nargs='+', default=ROUTES)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[4, 16, 64])
+    parser.add_argument('--duration', type=float, default=10.0)
+    args = parser.parse_args()
+
+    results = []
+    for route in args.routes:
+        for concurrency in args.concurrency:
+            row = {"route": route, "concurrency": concurrency}
+            for name, base in (("sync", args.sync_url), ("async", args.async_url)):
+                stats = run_load(base.rstrip('/') + route, concurrency, args.duration)
+                row[name] = {key: stats[key] for key in ("rps", "p50_ms", "p99_ms", "errors")}
+            results.append(row)
+            print(f"{route:<18} c={concurrency:<4} "
+                  f"sync {row['sync']['rps']:>8} rps p99 {row['sync']['p99_ms']:>8} ms | "
+                  f"async {row['async']['rps']:>8} rps p99 {row['async']['p99_ms']:>8} ms",
+                  file=sys.stderr)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Microbenchmark: home page render time and response size.
+
+Compares the old approach (render_template_string with the stylesheet
+inlined in a <style> block, re-parsed on every call) with the current one
+(template compiled once at import, stylesheet served from /static).
+
+No database or Redis is needed; only the templates are rendered.
+
+    python benchmarks/bench_template_render.py --iterations 2000
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+import app2  # noqa: E402
+from flask import render_template_string  # noqa: E402
+
+CONTEXT = {
+    'hostname': 'a1b2c3d4e5f6',
+    'container_ip': '172.18.0.4',
+    'python_version': '3.11.7',
+    'current_time': '2026-01-30 04:07:03',
+    'environment': 'production',
+    'container_id': 'a1b2c3d4e5f6',
+    'loaded_time': '04:07:03',
+    'db_status': 'Connected ✓',
+    'db_status_class': 'status-ok',
+    'db_host': 'mysql',
+    'db_name': 'docker_class',
+    'total_visits': 12345,
+    'redis_status': 'Connected ✓',
+    'redis_status_class': 'status-ok',
+    'redis_host': 'redis',
+    'page_views': 6789,
+    'cached_requests': 42
+}
+
+
+def inline_template(module, css_file):
+    """Rebuild the pre-change template with the stylesheet embedded"""
+    with open(os.path.join(module.app.static_folder, css_file)) as f:
+        css = f.read()
+    return module.HTML_TEMPLATE.replace(
+        '<link rel="stylesheet" href="{{ stylesheet_url }}">',
+        f'<style>\n{css}</style>'
+    )
+
+
+def bench(module, css_file, iterations):
+    old_source = inline_template(module, css_file)
+    context = dict(CONTEXT, stylesheet_url=module.STYLESHEET_URL)
+    with module.app.test_request_context('/'):
+        old_body = render_template_string(old_source, **context)
+        new_body = module.HOME_TEMPLATE.render(**context)
+        old_s = timeit.timeit(lambda: render_template_string(old_source, **context), number=iterations)
+        new_s = timeit.timeit(lambda: module.HOME_TEMPLATE.render(**context), number=iterations)
+    return {
+        "app": module.__name__,
+        "before": {"render_us": round(old_s / iterations * 1e6, 1), "html_bytes": len(old_body.encode())},
+        "after": {"render_us": round(new_s / iterations * 1e6, 1), "html_bytes": len(new_body.encode())},
+        "stylesheet_bytes": os.path.getsize(os.path.join(module.app.static_folder, css_file))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    results = [bench(app, 'app.css', args.iterations), bench(app2, 'app2.css', args.iterations)]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark: visit time series from Redis buckets vs MySQL GROUP BY.
+
+Seeds the same synthetic visits (spread over the last `--hours` hours and
+`--containers` containers) into both stores, then times assembling one
+window the two ways:
+
+    redis: get_visit_timeseries() - one pipelined HGETALL per bucket
+    mysql: SELECT <bucket>, COUNT(*) FROM visits WHERE timestamp >= ... GROUP BY <bucket>
+           plus the per-container GROUP BY, as the endpoint reports both
+
+Redis is REDIS_HOST/REDIS_PORT (`--fake` starts an in-process fakeredis
+instead); it FLUSHES the selected db. MySQL is DB_* and is skipped when
+unreachable; use a scratch database, the visits table is truncated.
+
+    DB_NAME=bench python benchmarks/bench_visit_timeseries.py --visits 200000 --windows 1h 24h
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import app2  # noqa: E402
+
+MYSQL_GROUP_BY = {
+    'minute': "DATE_FORMAT(timestamp, '%%Y-%%m-%%d %%H:%%i:00')",
+    'hour': "DATE_FORMAT(timestamp, '%%Y-%%m-%%d %%H:00:00')"
+}
+
+
+def synthetic_visits(count, hours, containers):
+    now = time.time()
+    for _ in range(count):
+        yield f'container-{random.randrange(containers)}', now - random.uniform(0, hours * 3600)
+
+
+def seed_redis(r, visits, chunk=5000):
+    r.flushdb()
+    pipe = r.pipeline(transaction=False)
+    for i, (container_id, at) in enumerate(visits, 1):
+        app2.queue_visit_buckets(pipe, container_id, now=at)
+        if i % chunk == 0:
+            pipe.execute()
+    pipe.execute()
+
+
+def seed_mysql(visits, chunk=5000):
+    """Returns False when MySQL is unreachable"""
+    try:
+        conn = app2.mysql_connector.connect(**app2.DB_CONFIG)
+    except app2.mysql_connector.Error as e:
+        print(f"Skipping MySQL: {e}", file=sys.stderr)
+        return False
+    cursor = conn.cursor()
+    cursor.execute('TRUNCATE TABLE visits')
+    rows = [(container_id, datetime.fromtimestamp(at)) for container_id, at in visits]
+    for start in range(0, len(rows), chunk):
+        cursor.executemany('INSERT INTO visits (container_id, timestamp) VALUES (%s, %s)', rows[start:start + chunk])
+    conn.commit()
+    cursor.close()
+    conn.close()
+    return True
+
+
+def mysql_timeseries(cursor, resolution, since):
+    bucket = MYSQL_GROUP_BY[resolution]
+    cursor.execute(f'SELECT {bucket} AS bucket, COUNT(*) FROM visits WHERE timestamp >= %s GROUP BY bucket ORDER BY bucket', (since,))
+    points = cursor.fetchall()
+    cursor.execute('SELECT container_id, COUNT(*) FROM visits WHERE timestamp >= %s GROUP BY container_id', (since,))
+    return points, cursor.fetchall()
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {"median_ms": round(statistics.median(samples), 3), "p95_ms": round(sorted(samples)[int(len(samples) * 0.95)], 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--visits', type=int, default=100000)
+    parser.add_argument('--hours', type=int, default=24, help='spread seeded visits over this many hours')
+    parser.add_argument('--containers', type=int, default=8)
+    parser.add_argument('--windows', nargs='+', default=['15m', '1h', '24h'])
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--fake', action='store_true', help='use an in-process fakeredis')
+    args = parser.parse_args()
+
+    if args.fake:
+        import fakeredis
+        app2.REDIS_POOL_CONFIG.update(connection_class=fakeredis.FakeConnection, server=fakeredis.FakeServer())
+
+    visits = list(synthetic_visits(args.visits, args.hours, args.containers))
+    seed_redis(app2.get_redis_connection(), visits)
+    mysql_ok = seed_mysql(visits)
+
+    results = []
+    for window in args.windows:
+        resolution, starts, _ = app2.parse_timeseries_request({'window': window})
+        row = {
+            "window": window,
+            "resolution": resolution,
+            "buckets": len(starts),
+            "redis": timed(lambda: app2.get_visit_timeseries(resolution, starts), args.repeat)
+        }
+        if mysql_ok:
+            conn = app2.mysql_connector.connect(**app2.DB_CONFIG)
+            cursor = conn.cursor()
+            since = datetime.fromtimestamp(starts[0])
+            row["mysql"] = timed(lambda: mysql_timeseries(cursor, resolution, since), args.repeat)
+            cursor.close()
+            conn.close()
+        results.append(row)
+        print(f"{window:>5} {resolution:<6} redis {row['redis']['median_ms']:>8} ms"
+              + (f"  mysql {row['mysql']['median_ms']:>8} ms" if mysql_ok else ""), file=sys.stderr)
+
+    print(json.dumps({"visits": args.visits, "containers": args.containers, "results": results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
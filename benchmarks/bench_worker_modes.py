@@ -0,0 +1,66 @@
+"""
+Compare gunicorn worker modes (APP_WORKER_MODE) at several CPU limits.
+
+For every CPU count the server is pinned with taskset, so gunicorn.conf.py
+derives its worker count from that limit exactly as it would from a
+container CPU quota. Each mode is then load-tested with benchmarks/run.py:
+
+    python benchmarks/bench_worker_modes.py --app app2 --cpus 1 2 8 \\
+        --modes sync gthread gevent --redis fake --mysql docker
+
+CPU counts larger than the machine has are skipped.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+RUN = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'run.py')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--app', choices=['app', 'app2'], default='app2')
+    parser.add_argument('--cpus', type=int, nargs='+', default=[1, 2, 8])
+    parser.add_argument('--modes', nargs='+', choices=['sync', 'gthread', 'gevent'], default=['sync', 'gthread', 'gevent'])
+    parser.add_argument('--routes', nargs='+', default=['/', '/info', '/api/visits'])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[8, 64])
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--redis', default='fake')
+    parser.add_argument('--mysql', default='none')
+    args = parser.parse_args()
+
+    available = len(os.sched_getaffinity(0))
+    results = []
+    for cpus in args.cpus:
+        if cpus > available:
+            print(f"Skipping {cpus} CPUs: only {available} available", file=sys.stderr)
+            continue
+        for mode in args.modes:
+            print(f"--- {cpus} CPU(s), {mode} workers", file=sys.stderr)
+            with tempfile.NamedTemporaryFile(suffix='.json') as output:
+                subprocess.run([
+                    sys.executable, RUN, 'run',
+                    '--app', args.app, '--server', 'gunicorn',
+                    '--cpus', str(cpus), '--env', f'APP_WORKER_MODE={mode}',
+                    '--redis', args.redis, '--mysql', args.mysql,
+                    '--routes', *args.routes,
+                    '--concurrency', *map(str, args.concurrency),
+                    '--duration', str(args.duration),
+                    '--output', output.name
+                ], check=True)
+                report = json.load(output)
+            for row in report['results']:
+                results.append({
+                    "cpus": cpus,
+                    "mode": mode,
+                    **{key: row[key] for key in ("route", "concurrency", "rps", "p50_ms", "p99_ms", "errors")}
+                })
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
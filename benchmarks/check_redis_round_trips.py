@@ -0,0 +1,86 @@
+"""
+Check: Redis round trips per request on app2's routes.
+
+Drives each route through Flask's test client and counts how often a Redis
+connection sends something (one send = one round trip; a pipeline is one
+send). Also reports the commands the server processed, from INFO stats.
+Exits with status 1 if a route needs more round trips than allowed:
+
+    REDIS_HOST=127.0.0.1 DB_HOST=127.0.0.1 python benchmarks/check_redis_round_trips.py
+
+Routes are warmed up first and the visit-total cache is pinned, so pool
+connection set-up and its periodic Redis refresh are not counted. Point
+it at a local redis-server; --fake uses an in-process fakeredis instead.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import app2  # noqa: E402
+
+EXPECTED = {'/': 1, '/api/visits': 1, '/api/redis-test': 1}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=20, help='requests per route')
+    parser.add_argument('--fake', action='store_true', help='use an in-process fakeredis')
+    args = parser.parse_args()
+
+    if args.fake:
+        import fakeredis
+        app2.REDIS_POOL_CONFIG.update(connection_class=fakeredis.FakeConnection, server=fakeredis.FakeServer())
+
+    connection_class = type(app2.get_redis_connection().connection_pool.make_connection())
+    sends = [0]
+    nested = threading.local()
+    original_send = connection_class.send_packed_command
+
+    def counting_send(self, *send_args, **send_kwargs):
+        # A connection health-check PING is sent from inside the outer send;
+        # count the outer one only
+        if getattr(nested, 'active', False):
+            return original_send(self, *send_args, **send_kwargs)
+        sends[0] += 1
+        nested.active = True
+        try:
+            return original_send(self, *send_args, **send_kwargs)
+        finally:
+            nested.active = False
+
+    # Serve the visit total from the worker's own copy for the whole run
+    app2.total_visits_cache.local_ttl = 3600
+    app2.total_visits_cache._store(app2.query_total_visits() or 0)
+    client = app2.app.test_client()
+    for route in EXPECTED:
+        client.get(route)
+    admin = app2.redis.Redis(**app2.REDIS_CONFIG) if not args.fake else None
+
+    connection_class.send_packed_command = counting_send
+    results, failed = [], False
+    for route, allowed in EXPECTED.items():
+        sends[0] = 0
+        commands_before = admin.info('stats')['total_commands_processed'] if admin else None
+        for _ in range(args.requests):
+            client.get(route)
+        round_trips = sends[0] / args.requests
+        row = {"route": route, "round_trips_per_request": round_trips, "allowed": allowed}
+        if admin:
+            # minus the INFO call itself
+            commands = admin.info('stats')['total_commands_processed'] - commands_before - 1
+            row["commands_per_request"] = round(commands / args.requests, 2)
+        failed |= round_trips > allowed
+        results.append(row)
+    connection_class.send_packed_command = original_send
+
+    print(json.dumps(results, indent=2))
+    if failed:
+        print("Some routes need more Redis round trips than allowed", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
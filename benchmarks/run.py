@@ -0,0 +1,323 @@
+"""
+Reproducible load-test harness for app.py, app2.py and app2_async.py.
+
+`run` boots the chosen app under the chosen server, optionally with local
+MySQL/Redis stand-ins, drives every route at each concurrency level and
+writes throughput and p50/p95/p99 latency as JSON:
+
+    python benchmarks/run.py run --app app2 --server gunicorn --redis fake \\
+        --concurrency 1 8 32 --duration 10 --output results/app2-gunicorn.json
+
+Dependency stand-ins (--redis / --mysql):
+    fake      fakeredis TCP server in a subprocess (Redis only)
+    docker    throwaway redis:7-alpine / mysql:8.0 containers
+    external  use REDIS_HOST/REDIS_PORT and DB_* from the environment
+    none      point at a closed port, i.e. benchmark the outage path
+
+`compare` flags regressions of a run against a saved baseline and exits
+with status 1 if any route got slower than the threshold allows:
+
+    python benchmarks/run.py compare results/baseline.json results/app2-gunicorn.json --threshold 0.10
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from loadgen import run_load  # noqa: E402
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ROUTES = {
+    'app': ['/', '/health', '/info'],
+    'app2': ['/', '/health', '/info', '/api/visits', '/api/redis-test', '/api/db-test'],
+    'app2_async': ['/', '/health', '/info', '/api/visits', '/api/redis-test', '/api/db-test']
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(url, timeout=60.0):
+    """Poll `url` until the server answers at all (any HTTP status)"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=2).read()
+            return True
+        except urllib.error.HTTPError:
+            return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+
+# ============ DEPENDENCY STAND-INS ============
+
+class Dependencies:
+    """Starts MySQL/Redis stand-ins and collects the env vars pointing at them"""
+
+    def __init__(self, redis_mode='none', mysql_mode='none'):
+        self.redis_mode = redis_mode
+        self.mysql_mode = mysql_mode
+        self.env = {}
+        self._processes = []
+        self._containers = []
+
+    def __enter__(self):
+        self._start_redis()
+        self._start_mysql()
+        return self
+
+    def __exit__(self, *exc):
+        for process in self._processes:
+            process.terminate()
+            process.wait(timeout=10)
+        for container in self._containers:
+            subprocess.run(['docker', 'rm', '-f', container], capture_output=True)
+
+    def _docker(self, image, container_port, *docker_args):
+        container = subprocess.check_output(
+            ['docker', 'run', '-d', '--rm', '-p', f'127.0.0.1::{container_port}', *docker_args, image],
+            text=True
+        ).strip()
+        self._containers.append(container)
+        mapping = subprocess.check_output(['docker', 'port', container, str(container_port)], text=True)
+        return int(mapping.splitlines()[0].rsplit(':', 1)[1])
+
+    def _start_redis(self):
+        if self.redis_mode == 'external':
+            return
+        if self.redis_mode == 'fake':
+            port = free_port()
+            self._processes.append(subprocess.Popen([
+                sys.executable, '-c',
+                'import sys; from fakeredis import TcpFakeServer; '
+                'TcpFakeServer(("127.0.0.1", int(sys.argv[1])), server_type="redis").serve_forever()',
+                str(port)
+            ]))
+        elif self.redis_mode == 'docker':
+            port = self._docker('redis:7-alpine', 6379)
+        else:
+            port = free_port()  # nothing listens here
+        self.env.update(REDIS_HOST='127.0.0.1', REDIS_PORT=str(port))
+        if self.redis_mode != 'none':
+            self._wait_for_port(port)
+
+    def _start_mysql(self):
+        if self.mysql_mode == 'external':
+            return
+        if self.mysql_mode == 'docker':
+            port = self._docker('mysql:8.0', 3306, '-e', 'MYSQL_ROOT_PASSWORD=bench', '-e', 'MYSQL_DATABASE=docker_class')
+            self.env.update(DB_HOST='127.0.0.1', DB_PORT=str(port), DB_USER='root',
+                            DB_PASSWORD='bench', DB_NAME='docker_class')
+            self._wait_for_mysql()
+        else:
+            self.env.update(DB_HOST='127.0.0.1', DB_PORT=str(free_port()))
+
+    @staticmethod
+    def _wait_for_port(port, timeout=30.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.1)
+        raise RuntimeError(f"Nothing listening on port {port} after {timeout}s")
+
+    def _wait_for_mysql(self, timeout=120.0):
+        """MySQL accepts TCP long before it accepts logins; create the schema once it does"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            result = subprocess.run(
+                [sys.executable, '-m', 'flask', '--app', 'app2', 'init-db'],
+                cwd=REPO_ROOT, env=dict(os.environ, **self.env), capture_output=True
+            )
+            if result.returncode == 0:
+                return
+            time.sleep(2)
+        raise RuntimeError("MySQL container did not become ready")
+
+
+# ============ SERVERS ============
+
+def server_command(app, server, workers, port):
+    """Command line for `server`; workers=None leaves the count to gunicorn.conf.py"""
+    if server == 'gunicorn':
+        worker_args = ['--workers', str(workers)] if workers else []
+        return ['gunicorn', '--config', 'gunicorn.conf.py', *worker_args,
+                '--bind', f'127.0.0.1:{port}', f'{app}:app']
+    if server == 'uvicorn':
+        return ['uvicorn', f'{app}:app', '--host', '127.0.0.1', '--port', str(port),
+                '--workers', str(workers or 1), '--log-level', 'warning']
+    if server == 'dev':
+        return [sys.executable, '-m', 'flask', '--app', app, 'run', '--host', '127.0.0.1', '--port', str(port)]
+    raise ValueError(f"Unknown server {server}")
+
+
+def start_server(app, server, workers, port, env, cpus=None, log=None):
+    """Start the app server; with `cpus`, pin it to that many CPUs via taskset"""
+    command = server_command(app, server, workers, port)
+    if cpus:
+        command = ['taskset', '--cpu-list', f'0-{cpus - 1}', *command]
+    return subprocess.Popen(
+        command,
+        cwd=REPO_ROOT,
+        env=dict(os.environ, PORT=str(port), **env),
+        stdout=log or subprocess.DEVNULL,
+        stderr=subprocess.STDOUT
+    )
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+# ============ COMMANDS ============
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    if args.server == 'uvicorn' and args.app != 'app2_async':
+        sys.exit("uvicorn serves the ASGI app only (--app app2_async)")
+    if args.server != 'uvicorn' and args.app == 'app2_async':
+        sys.exit("app2_async needs --server uvicorn")
+    routes = args.routes or ROUTES[args.app]
+    port = free_port()
+    base_url = f'http://127.0.0.1:{port}'
+
+    with Dependencies(args.redis, args.mysql) as deps:
+        server_log = open(args.server_log, 'w') if args.server_log else None
+        env = dict(deps.env, **args.env)
+        process = start_server(args.app, args.server, args.workers, port, env, args.cpus, server_log)
+        try:
+            if not wait_ready(base_url + '/health'):
+                sys.exit(f"{args.server} did not come up on {base_url}")
+            results = []
+            for route in routes:
+                for concurrency in args.concurrency:
+                    stats = run_load(base_url + route, concurrency, args.duration, args.warmup)
+                    stats.pop('url')
+                    results.append(dict(route=route, **stats))
+                    print(f"{route:<18} c={concurrency:<4} {stats['rps']:>9} rps  "
+                          f"p50 {stats['p50_ms']:>8} ms  p95 {stats['p95_ms']:>8} ms  "
+                          f"p99 {stats['p99_ms']:>8} ms  errors {stats['errors']}", file=sys.stderr)
+        finally:
+            stop_server(process)
+            if server_log:
+                server_log.close()
+
+    report = {
+        "meta": {
+            "app": args.app,
+            "server": args.server,
+            "workers": args.workers or 'auto',
+            "cpus": args.cpus or os.cpu_count(),
+            "env": args.env,
+            "redis": args.redis,
+            "mysql": args.mysql,
+            "duration_s": args.duration,
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "started_at": datetime.now().isoformat(timespec='seconds')
+        },
+        "results": results
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    base_rows = {(row['route'], row['concurrency']): row for row in baseline['results']}
+    regressions = 0
+    print(f"{'route':<18} {'conc':>4} {'rps':>18} {'p99 ms':>20}")
+    for row in current['results']:
+        key = (row['route'], row['concurrency'])
+        base = base_rows.get(key)
+        if base is None:
+            continue
+        rps_change = (row['rps'] - base['rps']) / base['rps'] if base['rps'] else 0.0
+        p99_change = (row['p99_ms'] - base['p99_ms']) / base['p99_ms'] if base['p99_ms'] else 0.0
+        regressed = rps_change < -args.threshold or p99_change > args.threshold
+        regressions += regressed
+        print(f"{key[0]:<18} {key[1]:>4} {base['rps']:>8} -> {row['rps']:<8} "
+              f"{base['p99_ms']:>8} -> {row['p99_ms']:<8} "
+              f"{rps_change:+7.1%} {p99_change:+7.1%}{'  REGRESSION' if regressed else ''}")
+
+    if regressions:
+        print(f"{regressions} regression(s) beyond {args.threshold:.0%}")
+        sys.exit(1)
+    print("No regressions")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='boot an app and load-test it')
+    run_parser.add_argument('--app', choices=sorted(ROUTES), default='app2')
+    run_parser.add_argument('--server', choices=['gunicorn', 'dev', 'uvicorn'], default='gunicorn')
+    run_parser.add_argument('--workers', type=int, help='worker count (default: derived by gunicorn.conf.py)')
+    run_parser.add_argument('--cpus', type=int, help='pin the server to this many CPUs (taskset)')
+    run_parser.add_argument('--redis', choices=['fake', 'docker', 'external', 'none'], default='fake')
+    run_parser.add_argument('--mysql', choices=['docker', 'external', 'none'], default='none')
+    run_parser.add_argument('--routes', nargs='+')
+    run_parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    run_parser.add_argument('--duration', type=float, default=10.0, help='seconds per route and concurrency level')
+    run_parser.add_argument('--warmup', type=float, default=1.0)
+    run_parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    run_parser.add_argument('--server-log', help='file for the server output')
+    run_parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                            help='extra server environment, e.g. --env APP_WORKER_MODE=gthread')
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = commands.add_parser('compare', help='flag regressions against a baseline')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help='allowed relative drop in rps / rise in p99 (default 0.10)')
+    compare_parser.set_defaults(handler=compare)
+
+    args = parser.parse_args()
+    if getattr(args, 'env', None) is not None:
+        args.env = dict(item.split('=', 1) for item in args.env)
+    if getattr(args, 'cpus', None) and not shutil.which('taskset'):
+        sys.exit("--cpus needs taskset (util-linux)")
+    args.handler(args)
+
+
+if __name__ == '__main__':
+    main()
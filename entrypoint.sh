@@ -0,0 +1,30 @@
+#!/bin/sh
+# Container entry point: starts the server selected by APP_SERVER.
+#
+#   APP_SERVER=sync   (default) gunicorn + Flask, module from APP_MODULE (app:app);
+#                     workers and worker class come from gunicorn.conf.py
+#   APP_SERVER=async  uvicorn + Quart, app2_async:app
+#
+# Any other command (e.g. `docker run <image> flask --app app2 ...`) is run as is.
+set -e
+
+if [ "$#" -gt 0 ]; then
+    exec "$@"
+fi
+
+PORT="${PORT:-5000}"
+
+case "${APP_SERVER:-sync}" in
+    sync)
+        exec gunicorn --config gunicorn.conf.py "${APP_MODULE:-app:app}"
+        ;;
+    async)
+        # One event loop per CPU the container may use, unless WEB_CONCURRENCY says otherwise
+        WORKERS="${WEB_CONCURRENCY:-$(python -c "import runpy; print(runpy.run_path('gunicorn.conf.py')['cpus'])")}"
+        exec uvicorn app2_async:app --host 0.0.0.0 --port "${PORT}" --workers "${WORKERS}"
+        ;;
+    *)
+        echo "Unknown APP_SERVER '${APP_SERVER}' (expected 'sync' or 'async')" >&2
+        exit 1
+        ;;
+esac
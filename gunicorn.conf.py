@@ -0,0 +1,133 @@
+"""
+Gunicorn settings for app.py / app2.py.
+
+    gunicorn -c gunicorn.conf.py app2:app
+
+Worker count and class are derived from the CPUs the container may actually
+use (cgroup quota, falling back to the affinity mask) and APP_WORKER_MODE:
+
+    sync     2 * CPUs + 1 single-threaded workers (default)
+    gthread  CPUs + 1 workers with GUNICORN_THREADS threads each
+    gevent   CPUs workers with GUNICORN_WORKER_CONNECTIONS greenlets each
+
+WEB_CONCURRENCY overrides the derived worker count.
+"""
+import glob
+import math
+import os
+import re
+import sys
+
+
+def cpu_limit():
+    """CPUs available to this container, honouring a cgroup CPU quota"""
+    # cgroup v2: "<quota> <period>" or "max <period>"
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            return max(1, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+
+    # cgroup v1: quota of -1 means unlimited
+    try:
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as f:
+            quota = int(f.read())
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as f:
+            period = int(f.read())
+        if quota > 0:
+            return max(1, math.ceil(quota / period))
+    except (OSError, ValueError):
+        pass
+
+    return len(os.sched_getaffinity(0))
+
+
+cpus = cpu_limit()
+worker_mode = os.getenv('APP_WORKER_MODE', 'sync')
+
+if worker_mode == 'gthread':
+    worker_class = 'gthread'
+    workers = cpus + 1
+    threads = int(os.getenv('GUNICORN_THREADS', 8))
+elif worker_mode == 'gevent':
+    worker_class = 'gevent'
+    workers = cpus
+    worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))
+elif worker_mode == 'sync':
+    worker_class = 'sync'
+    workers = 2 * cpus + 1
+else:
+    sys.exit(f"Unknown APP_WORKER_MODE '{worker_mode}' (expected sync, gthread or gevent)")
+
+if os.getenv('WEB_CONCURRENCY'):
+    workers = int(os.getenv('WEB_CONCURRENCY'))
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+
+# Import the app once in the master so workers share its memory copy-on-write
+# and start instantly. Off by default for gevent: modules imported before the
+# worker monkey-patches would keep blocking sockets and locks.
+preload_app = os.getenv('GUNICORN_PRELOAD', '0' if worker_mode == 'gevent' else '1') == '1'
+
+# Recycle workers periodically to cap slow leaks; the jitter keeps them from
+# all restarting at the same moment
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', max_requests // 10))
+
+# A preloaded app creates its Prometheus files while gunicorn loads it, before
+# any server hook runs, so the directory has to exist once this file is read
+if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+    os.makedirs(os.getenv('PROMETHEUS_MULTIPROC_DIR'), exist_ok=True)
+
+
+def _app_module(server):
+    """The already imported application module (e.g. app2), if any"""
+    return sys.modules.get(server.app.app_uri.split(':')[0])
+
+
+def on_starting(server):
+    """
+    Drop Prometheus files left by earlier runs. Those of this master, which
+    a preloaded app has already opened, are kept.
+    """
+    path = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if path:
+        for db_file in glob.glob(os.path.join(path, '*.db')):
+            match = re.search(r'_(\d+)\.db$', db_file)
+            if not match or int(match.group(1)) != os.getpid():
+                os.remove(db_file)
+
+
+def when_ready(server):
+    server.log.info(
+        "CPU limit %s, worker mode %s: %s workers, preload %s",
+        cpus, worker_mode, workers, 'on' if preload_app else 'off'
+    )
+    # The app imports its database drivers lazily; with a preloaded app the
+    # master imports them once so every worker inherits them at the fork
+    module = _app_module(server)
+    if preload_app and hasattr(module, 'preload_dependencies'):
+        module.preload_dependencies()
+
+
+def post_worker_init(worker):
+    """Open this worker's pools right after the fork instead of on the first request"""
+    module = _app_module(worker)
+    if hasattr(module, 'init_worker'):
+        module.init_worker()
+
+
+def worker_exit(server, worker):
+    """Flush per-worker state (e.g. buffered visits) before the worker goes away"""
+    module = _app_module(server)
+    if hasattr(module, 'shutdown_worker'):
+        module.shutdown_worker()
+
+
+def child_exit(server, worker):
+    """Tell the Prometheus multiprocess collector a worker is gone"""
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)